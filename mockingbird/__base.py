@@ -15,20 +15,25 @@
 #
 from __future__ import annotations
 
-import copy
+import hashlib
 import os
-import pathlib
 import random
 from abc import ABC, abstractmethod
+from array import array
 from collections import defaultdict
-from typing import final, List, Dict
-
-import yaml
-from random_words import RandomWords
+from functools import partial
+from typing import final, TYPE_CHECKING, Any, List, Mapping, Tuple, Union
 
+from ._config_registry import get_config
 from ._meta_data import _MetaData
+from ._sampler import _SamplingPlan
 from .random_data_generator import RandomDataGenerator
 
+# numpy is only imported once a document is created, so importing the package (i.e for mockingbird_cli --help) stays
+# quick
+if TYPE_CHECKING:
+    import numpy as np
+
 
 class __BaseDocument(ABC):
     """
@@ -37,47 +42,43 @@ class __BaseDocument(ABC):
     of how much sensitive-data is placed in each document, making benchmarking / comparisons easier to measure.
     """
 
-    # Static variables
-    rw = RandomWords()
+    # Static variables, the data set itself is loaded on first use.
     RANDOMDATA = RandomDataGenerator()
 
     @abstractmethod
-    def __init__(self, extension=None, config_file=None):
+    def __init__(self, extension=None, config_file=None, seed=None):
 
         if not extension:
             raise Exception("__BaseDocument extension not set")
 
+        import numpy as np
+
+        # Every document draws from its own random streams, seeded by a numpy SeedSequence. Documents created by this
+        # one (i.e styles) are seeded with sequences spawned from it, see _spawn_seed.
+        self._seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        python_seed, numpy_seed = self._seed_sequence.spawn(2)
+
+        self._random = random.Random(int.from_bytes(python_seed.generate_state(8).tobytes(), "little"))
+
+        # numpy generator used to draw large batches of random values at once
+        self._np_random = np.random.default_rng(numpy_seed)
+
         # meta-properties
         self.extension = extension  # to be defined in inherited classes
-        self.document_name = str(random.getrandbits(25))
+        self.document_name = self.__get_document_name()
 
         self._sensitive_data_mappings = dict()
 
         # lower and upper bounds for _total_entries
-        self._configurable_dict: Dict[str, str]
+        self._configurable_dict: Mapping[str, Any]
         self.__upper_bound_delta: int
         self._total_entries: int = 0
 
         self._config_file = config_file
 
-        # load the default config found in this folder if not set at a higher level
-        if self._config_file is None:
-            self._configurable_dict = self.__load_default_yaml()
-
-        # load the user defined config
-        else:
-            # load the config file as a string
-            if type(self._config_file) is str:
-                with open(self._config_file) as fh:
-                    self._configurable_dict = yaml.load(fh, Loader=yaml.FullLoader)
-
-            # copy the config if it is a dictionary
-            if type(self._config_file) is dict:
-                self._configurable_dict = copy.copy(self._config_file)
-
-            # raise an exception otherwise
-            else:
-                raise TypeError("Invalid config_file type. Received %s expected a dict or a str" % type(config_file))
+        # A shared read-only view of the default config, or the user defined config layered over it. Each config is
+        # only parsed once per process.
+        self._configurable_dict = get_config(self._config_file)
 
         self.__upper_bound_delta = self._configurable_dict["base_document"]["upper_bounds_delta"]
         self._total_entries = self._get_random_bounded_value()
@@ -85,6 +86,20 @@ class __BaseDocument(ABC):
         self.__fabricated_count = defaultdict(lambda: 0, dict())  # Set zero's for every value in dict
         self._meta_data_object = _MetaData()
 
+        # caps how many files save() writes, None means every file the document normally writes
+        self._file_limit = None
+
+        # how sensitive-data values are picked, see set_sampling_strategy. Documents in a session share the session's
+        # plan, each starting at its own position of the plan's exhaustive order.
+        self._sampling_plan = _SamplingPlan()
+        self._sampling_start = 0.0
+        self._samplers = dict()
+
+        # indices of the sensitive-data values picked since the last save, for each keyword, if the sampling plan
+        # tracks coverage. Batches are kept as the sampled arrays, single picks are appended to a flat int64 array.
+        self.__sampled_indices = defaultdict(list)
+        self.__sampled_index = defaultdict(partial(array, "q"))
+
     # Public Methods #
 
     @abstractmethod
@@ -97,6 +112,43 @@ class __BaseDocument(ABC):
         """
         raise NotImplementedError
 
+    @classmethod
+    def get_file_count(cls, configurable_dict: dict) -> int:
+        """
+        Returns how many files a single call to save() writes. Most documents write a single file, documents that
+        write multiple files (i.e multiple styles) override this so sessions can plan exactly how many documents to
+        create.
+
+        @param configurable_dict: The loaded configuration the document will be created with.
+        @return: The number of files save() outputs.
+        """
+        return 1
+
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        """
+        Returns roughly how many sensitive-data values a single call to save() picks for each keyword, so sessions
+        can plan where each document starts in the exhaustive sampling order (see set_sampling_strategy). Most
+        documents pick a single value for each keyword in each file, documents picking more override this.
+
+        @param configurable_dict: The loaded configuration the document will be created with.
+        @param file_limit: How many files save() writes, see set_file_limit.
+        @return: The expected number of values picked for each keyword.
+        """
+        return float(file_limit)
+
+    @final
+    def set_file_limit(self, limit: int) -> None:
+        """
+        Limits how many files save() writes, for documents writing more than one file. Used when planning an exact
+        number of files, where the final document may only need to write some of its files.
+
+        @param limit: A number between 1 and get_file_count()
+        """
+        assert 1 <= limit <= self.get_file_count(self._configurable_dict), "Invalid file limit %s" % limit
+
+        self._file_limit = limit
+
     @final
     def add_sensitive_data(self, keyword: str, entries: List[str]) -> None:
         """
@@ -118,13 +170,47 @@ class __BaseDocument(ABC):
     @final
     def clone_sensitive_data(self, other: __BaseDocument) -> None:
         """
-        Clones the sensitive-data from another __BaseDocument into this.
+        Clones the sensitive-data from another __BaseDocument into this. The other's samplers are shared rather than
+        copied, so i.e the styles of a document carry on sampling from where each other left off.
         """
 
         for sensitive_keyword in other._sensitive_data_mappings.keys():
             self.add_sensitive_data(keyword=sensitive_keyword,
                                     entries=other._sensitive_data_mappings[sensitive_keyword])
 
+        self._sampling_plan = other._sampling_plan
+        self._sampling_start = other._sampling_start
+        self._samplers = other._samplers
+
+    @final
+    def set_sampling_strategy(self, strategy: str, weights: dict = None, track_coverage: bool = False) -> None:
+        """
+        Sets how sensitive-data values are picked, which is shared by every document a session creates:
+
+            uniform: every value is picked independently at random (the default).
+            exhaustive: values are picked in a single shuffled order, across the whole session. Each document takes
+                        its own stretch of the order, sized by how many values it's expected to pick (see
+                        get_expected_draws), so values are rarely repeated before every value has been picked.
+                        Documents picking more or fewer values than expected can overlap, or leave gaps.
+            weighted: values are picked at random, in proportion to their weight.
+
+        For exhaustive and weighted sampling, or if track_coverage is set, how many of each keyword's values were
+        used is recorded in the meta-data, under 'value_coverage'.
+
+        @param strategy: One of "uniform", "exhaustive" or "weighted".
+        @param weights: For weighted sampling, a dictionary of keyword to the weight of each of its values, i.e
+                        {"ssn": [1, 5, 1]}. Keywords without weights are picked uniformly.
+        @param track_coverage: Records value coverage for uniform sampling too.
+        @raises ValueError: if the strategy is unknown, or weighted sampling is missing weights.
+        """
+        import numpy as np
+
+        # the exhaustive order is seeded by this document's seed, without spawning from it
+        seed = int.from_bytes(self._seed_sequence.generate_state(2, np.uint32).tobytes(), "little")
+
+        self._sampling_plan = _SamplingPlan(strategy, weights, seed, track_coverage)
+        self._samplers = dict()
+
     @final
     def dump_meta_data(self, output_file: str) -> None:
         """
@@ -132,6 +218,14 @@ class __BaseDocument(ABC):
         """
         self._meta_data_object.dump(output_file=output_file)
 
+    @final
+    def set_manifest_file(self, manifest_file: str) -> None:
+        """
+        Streams each saved file's meta-data to a JSON-lines manifest as it's saved, rather than holding it in memory
+        until dump_meta_data. The dumped meta-data then only holds the totals, and points to the manifest.
+        """
+        self._meta_data_object.set_manifest_file(manifest_file)
+
     @property
     def metadata(self):
         return self._meta_data_object.get_meta_data()
@@ -158,14 +252,43 @@ class __BaseDocument(ABC):
     # Protected Methods #
 
     @final
-    def _log_save(self, output_file: str) -> None:
+    def _log_save(self, output_file: str, sensitive_data_locations: dict = None) -> None:
         """
         Records the saved file's meta-data into a dictionary, where keys are the file names, and the values are
         how many sensitive-data were injected into the said file. This should be called whenever this program saves
         a file to disk that contains sensitive-data.
+
+        @param output_file: The saved file.
+        @param sensitive_data_locations: Optional, for documents that can record where in the file each keyword's
+                                         sensitive-data was placed (see _MetaData.add_data).
+        """
+
+        import numpy as np
+
+        self._meta_data_object.add_data(output_file, dict(self.__fabricated_count), sensitive_data_locations)
+
+        for keyword, index in self.__sampled_index.items():
+            self.__sampled_indices[keyword].append(np.array(index, dtype=np.int64))
+
+        for keyword, indices in self.__sampled_indices.items():
+            self._meta_data_object.add_value_usage(keyword, len(self._sensitive_data_mappings[keyword]),
+                                                   np.unique(np.concatenate(indices)))
+
+        self.__sampled_indices.clear()
+        self.__sampled_index.clear()
+
+    @final
+    def _set_sampling_plan(self, sampling_plan: _SamplingPlan, sampling_start: float) -> None:
         """
+        Shares a session's sampling plan with this document, see set_sampling_strategy.
 
-        self._meta_data_object.add_data(output_file, dict(self.__fabricated_count))
+        @param sampling_plan: The session's plan.
+        @param sampling_start: Where this document starts in the plan's exhaustive order, as the number of values the
+                               documents before it are expected to pick.
+        """
+        self._sampling_plan = sampling_plan
+        self._sampling_start = sampling_start
+        self._samplers = dict()
 
     @final
     def _set_upper_bound_delta(self, delta: int) -> None:
@@ -176,6 +299,28 @@ class __BaseDocument(ABC):
         self.__upper_bound_delta = delta
         self._total_entries = self._get_random_bounded_value()
 
+    @final
+    def __get_document_name(self) -> str:
+        """
+        Names the document after its position in the seed tree, i.e "3f9a1c0e77b2-4-2" is the document seeded by the
+        2nd seed spawned from the 4th seed spawned from the root seed, whose entropy hashes to "3f9a1c0e77b2". Every
+        seed spawned from a root seed has a unique path, so documents can't collide within a session no matter which
+        process created them, and sessions with different seeds (or unseeded sessions, which draw fresh entropy) get
+        different prefixes, so many processes or machines can generate into the same folder.
+        """
+
+        prefix = hashlib.sha256(str(self._seed_sequence.entropy).encode("utf-8")).hexdigest()[:12]
+        return prefix + "".join("-%d" % x for x in self._seed_sequence.spawn_key)
+
+    @final
+    def _spawn_seed(self) -> np.random.SeedSequence:
+        """
+        Returns a new seed for a document created by this one. Spawned seeds only depend on this document's seed and
+        how many seeds were spawned before, so documents are reproducible no matter which process creates them.
+        """
+
+        return self._seed_sequence.spawn(1)[0]
+
     @final
     def _get_sensitive_data(self, keyword: str) -> str:
         """
@@ -190,7 +335,87 @@ class __BaseDocument(ABC):
 
         self.__fabricated_count[keyword] += 1
 
-        return random.choice(self._sensitive_data_mappings[keyword])
+        entries = self._sensitive_data_mappings[keyword]
+
+        if self._sampling_plan.strategy == "uniform":
+            # the same draw random.choice makes
+            index = self._random.randrange(len(entries))
+        else:
+            index = int(self.__get_sampler(keyword).sample(1, self._np_random)[0])
+
+        if self._sampling_plan.track_coverage:
+            self.__sampled_index[keyword].append(index)
+
+        return entries[index]
+
+    @final
+    def _get_n_sensitive_data(self, keyword: str, n: int) -> np.ndarray:
+        """
+        Same as _get_sensitive_data, except n values are picked in a single batch.
+
+        @raises AssertionError: if keyword is not present in the _sensitive_data_mappings
+        @param keyword: A string entry contained in _sensitive_data_mappings
+        @param n: How many values to return.
+        @return: A numpy object array of n random values contained in the keyword's respective mapping file.
+        """
+        assert keyword in self._sensitive_data_mappings, "Keyword %s not in self._sensitive_data_mappings" % keyword
+
+        self.__fabricated_count[keyword] += n
+
+        entries = self._sensitive_data_mappings[keyword]
+
+        if self._sampling_plan.strategy == "uniform":
+            indices = self._np_random.integers(0, len(entries), size=n)
+        else:
+            indices = self.__get_sampler(keyword).sample(n, self._np_random)
+
+        if self._sampling_plan.track_coverage:
+            self.__sampled_indices[keyword].append(indices)
+
+        import numpy as np
+
+        values = np.empty(n, dtype=object)
+        values[:] = [entries[index] for index in indices]
+
+        return values
+
+    @final
+    def _discard_sensitive_data(self, keyword: str, value: str) -> None:
+        """
+        Stops counting a value picked by _get_sensitive_data, for documents which couldn't write it into the file (i.e
+        a character the pdf's font can't render). Must be called before the document is saved with _log_save.
+
+        @raises AssertionError: if value is not one of the keyword's picks waiting to be saved
+        @param keyword: The keyword the value was picked for.
+        @param value: The value returned by _get_sensitive_data.
+        """
+        assert self.__fabricated_count[keyword] > 0, "No %s value to discard" % keyword
+
+        self.__fabricated_count[keyword] -= 1
+        if self.__fabricated_count[keyword] == 0:
+            del self.__fabricated_count[keyword]
+
+        if self._sampling_plan.track_coverage:
+            entries = self._sensitive_data_mappings[keyword]
+            picks = self.__sampled_index[keyword]
+
+            # the latest pick of the value, as a value can be picked more than once
+            x = next((x for x in reversed(range(len(picks))) if entries[picks[x]] == value), None)
+            assert x is not None, "%s value %r was never picked" % (keyword, value)
+
+            picks.pop(x)
+
+    @final
+    def __get_sampler(self, keyword: str):
+        """
+        Returns the keyword's sampler, creating it from the sampling plan on first use.
+        """
+        if keyword not in self._samplers:
+            self._samplers[keyword] = self._sampling_plan.get_sampler(keyword,
+                                                                      len(self._sensitive_data_mappings[keyword]),
+                                                                      self._sampling_start)
+
+        return self._samplers[keyword]
 
     @final
     def _get_embedded_positions(self) -> dict:
@@ -212,7 +437,7 @@ class __BaseDocument(ABC):
         """
 
         pii_keywords = self._sensitive_data_mappings.keys()
-        random_sampling = random.sample(range(self._total_entries), len(pii_keywords))
+        random_sampling = self._random.sample(range(self._total_entries), len(pii_keywords))
 
         return dict(zip(random_sampling, pii_keywords))
 
@@ -225,7 +450,7 @@ class __BaseDocument(ABC):
         """
 
         pii_mapping_length = len(self._sensitive_data_mappings.keys())
-        return random.randint(pii_mapping_length + 1, pii_mapping_length + self.__upper_bound_delta)
+        return self._random.randint(pii_mapping_length + 1, pii_mapping_length + self.__upper_bound_delta)
 
     @final
     def _get_random_word(self) -> str:
@@ -235,26 +460,19 @@ class __BaseDocument(ABC):
 
         @return: String containing random non-sensitive information.
         """
-        return random.choice(self.RANDOMDATA.data_set)
+        return self._random.choice(self.RANDOMDATA.data_set)
 
     @final
     def _get_n_random_words(self, n: int) -> List[str]:
-        return random.sample(self.RANDOMDATA.data_set, n)
-
-    # Private Methods #
+        return self._random.sample(self.RANDOMDATA.data_set, n)
 
     @final
-    def __load_default_yaml(self) -> dict:
+    def _get_random_word_array(self, shape: Union[int, Tuple[int, ...]]) -> np.ndarray:
         """
-        Loads the _default_config.yml file found in the same directory as __BaseDocument
+        Returns a numpy object array of random words (picked with replacement), drawing every index in a single call.
 
-        @return Dictionary containing __default_config.yml
+        @param shape: The shape of the returned array.
+        @return: A numpy object array containing random non-sensitive information.
         """
-
-        file_path = os.path.join(pathlib.Path(__file__).parent.absolute(), "_default_config.yml")
-
-        assert os.path.exists(file_path)
-        with open(file_path) as fh:
-            settings_yaml = yaml.load(fh, Loader=yaml.FullLoader)
-
-        return settings_yaml
+        data_array = self.RANDOMDATA.data_array
+        return data_array[self._np_random.integers(0, len(data_array), size=shape)]
@@ -16,12 +16,12 @@
 
 import json
 import os
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 from tempfile import NamedTemporaryFile
 
-import requests
-
-from . import Mockingbird
+from . import Mockingbird, merge_meta_data
+from ._document_registry import get_extensions
+from ._keyword_coverage import COVERAGE_MODES
 from .mb_wrappers import MockingbirdFromCSV, MockingbirdFromMockaroo
 
 """
@@ -40,8 +40,9 @@ def parse_args():
     parser.add_argument("-i", "--input", action="store", dest="input", type=str,
                         help="Input file depending on Mockingbird session type. See --type for more details.")
 
-    parser.add_argument("-o", "--output", action="store", dest="output", type=str, required=True,
-                        help="A directory / path where the generated files will go.")
+    # not required by argparse, since the merge command has its own --output
+    parser.add_argument("-o", "--output", action="store", dest="output", type=str,
+                        help="A directory / path where the generated files will go. Required to generate files.")
 
     parser.add_argument("-t", "--type", action="store", dest="type", type=str, default='dry',
                         choices=['mockaroo', 'csv', 'csv_curl', 'dry'],
@@ -58,15 +59,79 @@ def parse_args():
                         choices=[True, False], default=True,
                         help="Export meta-data on completion. By default is set to True.")
 
-    mockingbird_extensions = [document().extension for document in Mockingbird.all_documents]
-    parser.add_argument("--extensions", nargs="+", action="store", dest="extensions", type=list, default=[],
-                        choices=mockingbird_extensions,
+    parser.add_argument("-w", "--workers", action="store", dest="workers", type=int, default=1,
+                        help="How many worker processes to generate documents with. By default is set to 1.")
+
+    parser.add_argument("-n", "--file_count", action="store", dest="file_count", type=int,
+                        help="The exact number of files to generate. By default 100 files are generated.")
+
+    parser.add_argument("-s", "--seed", action="store", dest="seed", type=int,
+                        help="Seeds the session, so the same seed (and inputs) always generates identical files, no "
+                             "matter how many workers are used. By default every run is random.")
+
+    parser.add_argument("--shard", action="store", dest="shard", type=parse_shard,
+                        help="Only generate one shard of the files, written as i/N (0 <= i < N), i.e --shard 0/4 on "
+                             "the first of four machines. Use the same --seed on every machine, then combine the "
+                             "shards' meta-data with 'mockingbird_cli merge'.")
+
+    parser.add_argument("--coverage", action="store", dest="coverage", type=str, default="product",
+                        choices=COVERAGE_MODES,
+                        help="How csv and mockaroo keywords are combined into sessions. 'product' generates documents "
+                             "for every combination of keywords, 'each' makes sure every keyword is used, and "
+                             "'pairwise' makes sure every pair of keywords from different columns is used together. "
+                             "By default is set to product.")
+
+    parser.add_argument("--sampling", action="store", dest="sampling", type=str, default="uniform",
+                        choices=["uniform", "exhaustive"],
+                        help="How sensitive-data values are picked. 'uniform' picks every value independently at "
+                             "random, 'exhaustive' walks a single shuffled order of the values across the whole run, "
+                             "each document taking the stretch it's expected to need, so values are rarely repeated "
+                             "before every value is used. By default is set to uniform.")
+
+    parser.add_argument("--manifest", action="store_true", dest="manifest",
+                        help="Stream each file's meta-data to manifest.jsonl in the output folder as it's written, "
+                             "rather than holding it in memory. meta-data.json then only holds the totals.")
+
+    parser.add_argument("--extensions", nargs="+", action="store", dest="extensions", type=str, default=[],
+                        choices=get_extensions(),
                         help="Set the file extension types. If none are set, all will be selected.")
 
+    # generating files is the default command, so it's run whenever no other command is given
+    commands = parser.add_subparsers(dest="command", metavar="command",
+                                     help="Optional, without a command files are generated.")
+
+    merge_parser = commands.add_parser("merge", help="Combines the meta-data files of every shard into a single "
+                                                     "meta-data file.",
+                                       description="Combines the meta-data files of every shard into a single "
+                                                   "meta-data file.")
+    merge_parser.add_argument("meta_data_files", nargs="+",
+                              help="The meta-data.json file of every shard.")
+    merge_parser.add_argument("-o", "--output", action="store", dest="output", type=str, required=True,
+                              help="Where to write the merged meta-data file.")
+
     args = parser.parse_args()
+
+    if args.command is None and args.output is None:
+        parser.error("the following arguments are required: -o/--output")
+
     return args
 
 
+def parse_shard(shard: str) -> tuple:
+    """
+    Parses a shard written as i/N into a (shard_index, shard_count) tuple.
+    """
+    try:
+        shard_index, shard_count = (int(value) for value in shard.split("/"))
+    except ValueError:
+        raise ArgumentTypeError("Invalid shard %s, expected i/N" % shard)
+
+    if not 0 <= shard_index < shard_count:
+        raise ArgumentTypeError("Invalid shard %s, expected 0 <= i < N" % shard)
+
+    return shard_index, shard_count
+
+
 def setup_mockingbird_type_from_args(args):
     """
     Accepts args and will exhaustively return a Mockingbird type based on the type requested.
@@ -78,7 +143,7 @@ def setup_mockingbird_type_from_args(args):
     if args.type == "csv":
         assert args.input, "csv file not set, use -i [file_name].csv to specify."
 
-        return MockingbirdFromCSV(args.input)
+        return MockingbirdFromCSV(args.input, workers=args.workers, seed=args.seed, coverage=args.coverage)
 
     if args.type == "csv_curl":
         """
@@ -89,10 +154,14 @@ def setup_mockingbird_type_from_args(args):
 
         # todo validate user input
         curl_csv = NamedTemporaryFile(mode="wb")
+        # only imported when needed, to keep the cli's startup fast
+        import requests
+
         response = requests.get(url=args.input)
         curl_csv.write(response.content)
 
-        return MockingbirdFromCSV(curl_csv.name)
+        return MockingbirdFromCSV(curl_csv.name, workers=args.workers, seed=args.seed,
+                                  coverage=args.coverage)
 
     if args.type == "mockaroo":
         assert args.mockaroo_api, "mockaroo api key not set. See --help for more details."
@@ -102,11 +171,12 @@ def setup_mockingbird_type_from_args(args):
         with open(args.input) as json_file:
             schema_request = json.load(json_file)
 
-        return MockingbirdFromMockaroo(api_key=args.mockaroo_api, schema_request=schema_request)
+        return MockingbirdFromMockaroo(api_key=args.mockaroo_api, schema_request=schema_request,
+                                       workers=args.workers, seed=args.seed, coverage=args.coverage)
 
     if args.type == "dry":
         # Instantiate a new Mockingbird Session
-        fab = Mockingbird()
+        fab = Mockingbird(workers=args.workers, seed=args.seed)
 
         # Add "dry-run" data
         fab.add_sensitive_data("ssn", ["000-000-0000", "999-999-9999"])
@@ -117,6 +187,10 @@ def setup_mockingbird_type_from_args(args):
 def main() -> int:
     args = parse_args()
 
+    if args.command == "merge":
+        merge_meta_data(args.meta_data_files, args.output)
+        return 0
+
     # Create a Mockingbird session based on what the CLI arguments required.
     session = setup_mockingbird_type_from_args(args)
 
@@ -128,6 +202,18 @@ def main() -> int:
     else:
         session.set_file_extensions(args.extensions)
 
+    if args.file_count is not None:
+        session.set_file_count(args.file_count)
+
+    if args.shard is not None:
+        session.set_shard(*args.shard)
+
+    if args.sampling != "uniform":
+        session.set_sampling_strategy(args.sampling)
+
+    if args.manifest:
+        session.set_manifest_file(os.path.join(args.output, "manifest.jsonl"))
+
     session.save(args.output)
 
     if args.meta:
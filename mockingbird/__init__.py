@@ -14,11 +14,31 @@
 # limitations under the License.
 #
 
-from typing import final
+from __future__ import annotations
+
+import json
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, repeat
+from typing import final, TYPE_CHECKING, List, Tuple
 
 from .__base import __BaseDocument
-from .structured_data_document import __all_classes__ as _structured_data_all
-from .unstructured_data_document import __all_classes__ as _unstructured_data_all
+from ._document_registry import get_document_class, get_extensions
+from ._meta_data import _MetaData
+from ._sampler import _SamplingPlan
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class _AllDocuments:
+    """
+    Mockingbird.all_documents, a list of every document class Mockingbird can generate. Each document class imports its
+    format's libraries, so the classes are only imported when the list is accessed, see _document_registry.
+    """
+
+    def __get__(self, instance, owner) -> List[type]:
+        return [get_document_class(extension) for extension in get_extensions()]
 
 
 class Mockingbird(__BaseDocument):
@@ -29,66 +49,170 @@ class Mockingbird(__BaseDocument):
     """
 
     # A list of all possible classes Mockingbird can generate
-    all_documents = []
-    all_documents.extend(_structured_data_all)
-    all_documents.extend(_unstructured_data_all)
-
-    def __init__(self, file_minimum=100, config_file=None):
-        super().__init__(extension="mockingbird", config_file=config_file)
-
-        # Create a list of key to classes mappings
-        self.__extension_to_classes = {}
-        for document_type in Mockingbird.all_documents:
-            extension = document_type.EXT
+    all_documents = _AllDocuments()
 
-            assert extension not in self.__extension_to_classes, \
-                "overlapping extensions! %s " % extension
+    def __init__(self, file_minimum=100, config_file=None, workers=1, file_count=None, seed=None):
+        """
+        @param file_minimum: How many files to generate, unless file_count is set.
+        @param config_file: Optional, a path or dictionary overriding the default configuration.
+        @param workers: How many worker processes to generate documents with.
+        @param file_count: Optional, overrides file_minimum. Either the exact number of files to generate, or a
+                           dictionary mapping selected extensions to the exact number of files for that extension,
+                           i.e {"docx": 8, "csv": 3}
+        @param seed: Optional, an int (or numpy SeedSequence) seeding the session. Every document is given its own
+                     random stream spawned from the seed, so a seeded session outputs byte-identical files no matter
+                     how many workers it uses.
+        """
+        super().__init__(extension="mockingbird", config_file=config_file, seed=seed)
 
-            self.__extension_to_classes[extension] = document_type
+        assert workers >= 1, "workers must be at least 1, received %s" % workers
 
         self._file_extensions = []
         self._file_minimum = file_minimum
+        self._file_count = file_count
+        self._workers = workers
+
+        # (index, count) when only generating a single shard of the session, see set_shard
+        self._shard = None
 
     def save(self, save_path: str) -> None:
         """
         Saves all the selected file extensions to a given path.
         @param save_path: A system path where the fabricated-documents will go.
         """
+        work_list, seeds, sampling_starts = self._plan_documents()
+
+        if self._workers > 1:
+            self._save_parallel(work_list, seeds, sampling_starts, save_path)
+            return
+
+        for (child_class, file_limit), seed, sampling_start in zip(work_list, seeds, sampling_starts):
+            """
+            Copy the sensitive-data inputted into this Mockingbird instance, and inject it into each child-object
+            in this for loop. Since every object all inherits from the same __BaseDocument type, polymorphism
+            is invoked here so each child-object will have the same sensitive-information as it's parent 
+            Mockingbird instance. 
+            """
+            child_meta_data = _save_child_document(child_class=child_class,
+                                                   file_limit=file_limit,
+                                                   seed=seed,
+                                                   config_file=self._config_file,
+                                                   sensitive_data_mappings=self._sensitive_data_mappings,
+                                                   sampling_plan=self._sampling_plan,
+                                                   sampling_start=sampling_start,
+                                                   save_path=save_path)
+
+            # Update Mockingbird's meta-data to now include the meta-data of it's child-objects
+            self._meta_data_object.add_other_meta_data(child_meta_data)
+
+    def _save_parallel(self, work_list: List[Tuple[type, int]], seeds: List[np.random.SeedSequence],
+                       sampling_starts: List[float], save_path: str) -> None:
+        """
+        Same as the serial loop in save(), except each child-document is built and saved in a pool of worker
+        processes. Every worker returns the _MetaData of the document it saved, and the results are merged back into
+        this instance in work-list order.
+        """
+
+        # Hand out work in chunks to cut down on inter-process overhead, while keeping every worker busy.
+        chunk_size = max(1, len(work_list) // (self._workers * 4))
+        child_classes = [child_class for child_class, _ in work_list]
+        file_limits = [file_limit for _, file_limit in work_list]
+
+        with ProcessPoolExecutor(max_workers=self._workers) as executor:
+            results = executor.map(_save_child_document,
+                                   child_classes,
+                                   file_limits,
+                                   seeds,
+                                   repeat(self._config_file),
+                                   repeat(self._sensitive_data_mappings),
+                                   repeat(self._sampling_plan),
+                                   sampling_starts,
+                                   repeat(save_path),
+                                   chunksize=chunk_size)
+
+            for child_meta_data in results:
+                self._meta_data_object.add_other_meta_data(child_meta_data)
+
+    def _plan_documents(self) -> Tuple[List[Tuple[type, int]], List[np.random.SeedSequence], List[float]]:
+        """
+        Plans the documents this session (or shard of the session) creates, the seed each document is created
+        with, and where each document starts in the session's exhaustive sampling order (see set_sampling_strategy).
+
+        @return: The work list (see _get_work_list), and a seed and sampling start for each of its documents.
+        """
         assert len(self._file_extensions) > 0, "No extensions set!"
 
+        work_list = self._get_work_list()
+
+        # seeds are spawned in work-list order, before any document is created
+        seeds = [self._spawn_seed() for _ in work_list]
+
+        # each document starts where the documents before it are expected to finish, so together they walk the
+        # sampling order end to end
+        expected_draws = [child_class.get_expected_draws(self._configurable_dict, file_limit)
+                          for child_class, file_limit in work_list]
+        sampling_starts = [0.0] + list(accumulate(expected_draws))[:-1]
+        self._sampling_plan.expected_draws = sum(expected_draws)
+
+        if self._shard is not None:
+            shard_index, shard_count = self._shard
+            work_list = work_list[shard_index::shard_count]
+            seeds = seeds[shard_index::shard_count]
+            sampling_starts = sampling_starts[shard_index::shard_count]
+
+        return work_list, seeds, sampling_starts
+
+    def _get_work_list(self) -> List[Tuple[type, int]]:
         """
-        Create and add a list of instantiated objects this Mockingbird object will output. _file_extensions
-        is set by the user / developer.
+        Plans exactly which documents to create, so the session outputs exactly the number of files requested. Every
+        document class knows how many files it writes per save (i.e docx writes a file for each of its styles), so
+        documents are planned round-robin over the selected extensions, with the last document of an extension
+        limited to the remaining number of files.
+
+        @return: A list of (document class, file limit) tuples, in the order they should be generated.
         """
-        doc_array = []
+
+        # Files written per save() for each selected extension, skipping any extension with all its styles disabled.
+        files_per_save = OrderedDict()
         for ext in self._file_extensions:
-            doc_array.append(self.__extension_to_classes.get(ext))
+            file_count = get_document_class(ext).get_file_count(self._configurable_dict)
+            if file_count > 0:
+                files_per_save[ext] = file_count
 
-        while len(self._meta_data_object) < self._file_minimum:
-            """
-            Keep repeating the process until we've reached our _file_minimum. This probably over-generates, but over
-            generating is easier than under. 
-            """
-            for x in range(len(doc_array)):
-                """
-                Copy the sensitive-data inputted into this Mockingbird instance, and inject it into each child-object
-                in this for loop. Since every object all inherits from the same __BaseDocument type, polymorphism
-                is invoked here so each child-object will have the same sensitive-information as it's parent 
-                Mockingbird instance. 
-                """
+        assert len(files_per_save) > 0, "None of the selected extensions output any files!"
+
+        requested = self._file_minimum if self._file_count is None else self._file_count
+
+        work_list = []
+
+        if isinstance(requested, dict):
+            for ext, count in requested.items():
+                assert ext in self._file_extensions, "extension %s has not been selected" % ext
+                assert count == 0 or ext in files_per_save, \
+                    "%d %s files requested, but all of its styles are disabled" % (count, ext)
 
-                # Create an object for each class selected
-                child_class = doc_array[x]
-                child_object = child_class(config_file=self._config_file)
+            remaining = {ext: requested.get(ext, 0) for ext in files_per_save}
 
-                # Clone over the sensitive-data in "self" into all the children objects.
-                child_object.clone_sensitive_data(other=self)
+            while any(remaining.values()):
+                for ext, file_count in files_per_save.items():
+                    if remaining[ext] > 0:
+                        file_limit = min(file_count, remaining[ext])
+                        work_list.append((get_document_class(ext), file_limit))
+                        remaining[ext] -= file_limit
 
-                # Save each child object
-                child_object.save(save_path)
+        else:
+            remaining = requested
 
-                # Update Mockingbird's meta-data to now include the meta-data of it's child-objects
-                self._meta_data_object.add_other_meta_data(child_object._meta_data_object)
+            while remaining > 0:
+                for ext, file_count in files_per_save.items():
+                    if remaining <= 0:
+                        break
+
+                    file_limit = min(file_count, remaining)
+                    work_list.append((get_document_class(ext), file_limit))
+                    remaining -= file_limit
+
+        return work_list
 
     @final
     def set_file_extensions(self, extensions: list) -> None:
@@ -96,14 +220,80 @@ class Mockingbird(__BaseDocument):
         Sets the output extension types.
         """
         for ext in extensions:
-            assert ext in self.__extension_to_classes, "extension %s not found in Mockingbird" % ext
+            assert ext in get_extensions(), "extension %s not found in Mockingbird" % ext
 
         self._file_extensions = extensions
 
+    @final
+    def set_file_count(self, file_count) -> None:
+        """
+        Sets the exact number of files to output, either as a total or as a dictionary of extension to file count.
+        """
+        self._file_count = file_count
+
+    @final
+    def set_shard(self, shard_index: int, shard_count: int) -> None:
+        """
+        Only generates a single shard of the session, so a session can be split across machines without any
+        coordination. The whole session is planned as usual, and every shard_count-th document (starting at
+        shard_index) belongs to the shard. Documents keep the seed they would have in the whole session, so for a
+        seeded session, the union of every shard is byte-identical to generating the session in one go.
+
+        The meta-data records the shard, and merge_meta_data combines the meta-data of every shard.
+
+        @param shard_index: Which shard to generate, between 0 and shard_count - 1.
+        @param shard_count: How many shards the session is split into.
+        """
+        assert 0 <= shard_index < shard_count, "Invalid shard %s/%s" % (shard_index, shard_count)
+
+        self._shard = (shard_index, shard_count)
+        self._meta_data_object.set_shard(shard_index, shard_count)
+
     @final
     def set_all_extensions(self) -> None:
         """
         Enables all extensions.
         """
-        all_extensions = list(self.__extension_to_classes.keys())
-        self._file_extensions = all_extensions
+        self._file_extensions = get_extensions()
+
+
+def merge_meta_data(meta_data_files: List[str], output_file: str) -> None:
+    """
+    Combines the meta-data files of every shard of a sharded session (see Mockingbird.set_shard) into a single
+    meta-data file covering the whole session.
+
+    @param meta_data_files: The meta-data file of every shard.
+    @param output_file: Where to write the merged meta-data.
+    @raises ValueError: if a shard is missing or repeated.
+    """
+
+    shards = []
+    for meta_data_file in meta_data_files:
+        with open(meta_data_file, encoding="utf-8") as f:
+            shards.append(_MetaData.from_meta_data(json.load(f), meta_data_file))
+
+    _MetaData.merge_shards(shards).dump(output_file)
+
+
+def _save_child_document(child_class, file_limit: int, seed: np.random.SeedSequence, config_file,
+                         sensitive_data_mappings: dict, sampling_plan: _SamplingPlan, sampling_start: float,
+                         save_path: str) -> _MetaData:
+    """
+    Creates a single child-document, injects the parent's sensitive-data into it and saves it to save_path. This is a
+    module level function so it can be pickled and run inside of a worker process.
+
+    @return: The _MetaData of the saved child-document.
+    """
+
+    # Create an object for the class selected
+    child_object = child_class(config_file=config_file, seed=seed)
+    child_object.set_file_limit(file_limit)
+
+    # Clone over the parent's sensitive-data into the child object.
+    for keyword, entries in sensitive_data_mappings.items():
+        child_object.add_sensitive_data(keyword=keyword, entries=entries)
+
+    child_object._set_sampling_plan(sampling_plan, sampling_start)
+
+    child_object.save(save_path)
+    return child_object._meta_data_object
@@ -0,0 +1,191 @@
+#
+# Copyright 2021 Open Raven Inc. and the Mockingbird project authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping
+
+DEFAULT_CONFIG_PATH = os.path.join(pathlib.Path(__file__).parent.absolute(), "_default_config.yml")
+
+
+class _ConfigRegistry:
+    """
+    A process-wide registry of loaded configurations. Every __BaseDocument needs a configuration, and a single
+    Mockingbird session creates thousands of documents (and internal style documents), so each configuration is only
+    parsed and validated once, then every document shares the same read-only view of it.
+
+    User configurations are layered on top of _default_config.yml, so a user configuration only needs to contain the
+    settings it changes.
+    """
+
+    def __init__(self):
+        self._configs = dict()
+        self._lock = threading.Lock()
+
+    def get_config(self, config_file=None) -> Mapping[str, Any]:
+        """
+        Returns the read-only configuration for config_file, loading it if it hasn't been seen before.
+
+        @param config_file: None for the default configuration, a path to a yaml file, or a dictionary.
+        @return: A read-only mapping of the configuration, lists are converted to tuples.
+        @raises TypeError: if config_file isn't None, a str or a dict.
+        @raises ValueError: if the configuration is missing settings or has invalid values.
+        """
+
+        # Already a config handed out by this registry
+        if isinstance(config_file, MappingProxyType):
+            return config_file
+
+        key = self.__get_key(config_file)
+
+        with self._lock:
+            config = self._configs.get(key)
+
+            if config is None:
+                config = self.__load(config_file)
+                self._configs[key] = config
+
+        return config
+
+    def clear(self) -> None:
+        """
+        Forgets every loaded configuration.
+        """
+        with self._lock:
+            self._configs.clear()
+
+    @staticmethod
+    def __get_key(config_file) -> tuple:
+        if config_file is None:
+            return "default",
+
+        # re-load files if they're edited
+        if type(config_file) is str:
+            path = os.path.abspath(config_file)
+            return "path", path, os.stat(path).st_mtime_ns
+
+        # dictionaries are keyed by their contents, so changing a dictionary creates a new configuration
+        if type(config_file) is dict:
+            return "dict", json.dumps(config_file, sort_keys=True, default=repr)
+
+        raise TypeError("Invalid config_file type. Received %s expected a dict or a str" % type(config_file))
+
+    def __load(self, config_file) -> Mapping[str, Any]:
+        config = _load_yaml(DEFAULT_CONFIG_PATH)
+
+        if type(config_file) is str:
+            config = _merge_config(config, _load_yaml(config_file))
+
+        elif type(config_file) is dict:
+            config = _merge_config(config, config_file)
+
+        _validate_config(config)
+        return _freeze_config(config)
+
+
+def _load_yaml(file_path: str) -> dict:
+    import yaml
+
+    with open(file_path) as fh:
+        return yaml.load(fh, Loader=yaml.FullLoader)
+
+
+def _merge_config(base: dict, override: Mapping) -> dict:
+    """
+    Returns a copy of base, recursively updated with the values found in override.
+    """
+    merged = dict(base)
+
+    for key, value in override.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), Mapping):
+            merged[key] = _merge_config(merged[key], value)
+        else:
+            merged[key] = value
+
+    return merged
+
+
+def _validate_config(config: Mapping) -> None:
+    """
+    Checks the settings every document relies on, so a bad configuration fails once when it's loaded, rather than
+    part way through generating documents.
+
+    @raises ValueError: if a setting is missing or invalid.
+    """
+
+    def get_setting(*keys):
+        value = config
+        for key in keys:
+            if not isinstance(value, Mapping) or key not in value:
+                raise ValueError("Invalid config, missing setting %s" % ".".join(keys))
+            value = value[key]
+        return value
+
+    upper_bounds_delta = get_setting("base_document", "upper_bounds_delta")
+    if type(upper_bounds_delta) is not int or upper_bounds_delta < 1:
+        raise ValueError("Invalid config, base_document.upper_bounds_delta must be a positive integer")
+
+    for section in ["base_structured_data", "base_unstructured_data"]:
+        stream_chunk_size = get_setting(section, "stream_chunk_size")
+        if type(stream_chunk_size) is not int or stream_chunk_size < 1:
+            raise ValueError("Invalid config, %s.stream_chunk_size must be a positive integer" % section)
+
+    for range_name in ["dictionary_range", "entries_range"]:
+        bounds = get_setting("base_structured_data", range_name)
+        if len(bounds) != 2 or not 0 <= bounds[0] <= bounds[1]:
+            raise ValueError("Invalid config, base_structured_data.%s must be a [lower, upper] pair" % range_name)
+
+
+def _freeze_config(value):
+    """
+    Recursively converts dictionaries into read-only mappings, and lists into tuples.
+    """
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: _freeze_config(item) for key, item in value.items()})
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_config(item) for item in value)
+
+    return value
+
+
+def thaw_config(value):
+    """
+    Returns a mutable deep-copy of a configuration handed out by the registry, i.e to create a modified
+    configuration from it.
+    """
+    if isinstance(value, Mapping):
+        return {key: thaw_config(item) for key, item in value.items()}
+
+    if isinstance(value, tuple):
+        return [thaw_config(item) for item in value]
+
+    return value
+
+
+_config_registry = _ConfigRegistry()
+
+
+def get_config(config_file=None) -> Mapping[str, Any]:
+    """
+    Returns the shared read-only configuration for config_file, see _ConfigRegistry.get_config.
+    """
+    return _config_registry.get_config(config_file)
@@ -0,0 +1,246 @@
+#
+# Copyright 2021 Open Raven Inc. and the Mockingbird project authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import io
+import json
+import os
+import struct
+import tempfile
+from array import array
+from collections.abc import Sequence
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from .random_data_generator import _get_cache_dir
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_CACHE_VERSION = 2
+_CACHE_MAGIC = b"MBCOLS%02d" % _CACHE_VERSION
+
+# sections of the cache are aligned, so offsets can be viewed as int64s straight from the memory-mapped file
+_CACHE_ALIGNMENT = 8
+
+
+class _CompactColumn(Sequence):
+    """
+    A read-only column of strings, stored as one contiguous UTF-8 buffer, along with the offset each string starts at.
+    Strings are only decoded when they're accessed, so millions of values take little more memory than the csv itself,
+    and any value can be accessed in O(1).
+
+    Columns loaded from a cache are memory-mapped, and pickle (i.e to a worker process) as a reference to the cache,
+    rather than a copy of the values.
+    """
+
+    def __init__(self, buffer: np.ndarray, offsets: np.ndarray, cache_file: str = None, index: int = None):
+        """
+        @param buffer: A uint8 array of every value's UTF-8 encoding, back to back.
+        @param offsets: An int64 array of where each value starts in buffer, with one extra offset marking the end of
+                        the last value.
+        @param cache_file: Optional, the cache the column was memory-mapped from.
+        @param index: Optional, the position of the column in cache_file.
+        """
+        self._buffer = buffer
+        self._offsets = offsets
+        self._cache_file = cache_file
+        self._index = index
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+
+        if not 0 <= index < len(self):
+            raise IndexError("column index out of range")
+
+        return self._buffer[self._offsets[index]:self._offsets[index + 1]].tobytes().decode("utf-8")
+
+    def __reduce__(self):
+        if self._cache_file is not None:
+            return _load_cached_column, (self._cache_file, self._index)
+
+        return _CompactColumn, (self._buffer, self._offsets)
+
+
+def load_csv_columns(csv_file: str, cache_min_bytes: int = None) -> Dict[str, _CompactColumn]:
+    """
+    Loads each column of a csv file into a _CompactColumn, keyed by the column's header, skipping empty values
+    and columns with no values at all.
+
+    csv files of at least cache_min_bytes are converted once into a binary cache (keyed by a hash of the csv's
+    contents), which later loads memory-map rather than parse the csv again.
+
+    @param csv_file: Path to a csv file, with a header row.
+    @param cache_min_bytes: Optional, the smallest csv file to cache. By default nothing is cached.
+    @return: A dictionary of column header to column values, in column order.
+    """
+    if cache_min_bytes is None or os.path.getsize(csv_file) < cache_min_bytes:
+        return _parse_csv_columns(csv_file)
+
+    cache_file = os.path.join(_get_cache_dir(), "csv-columns-%s.bin" % _hash_file(csv_file))
+
+    try:
+        return _load_cache(cache_file)
+    except OSError:
+        pass
+
+    columns = _parse_csv_columns(csv_file)
+    _write_cache(cache_file, columns)
+
+    # once cached, the parsed columns are swapped for memory-mapped ones, which share memory between processes
+    try:
+        return _load_cache(cache_file)
+    except OSError:
+        return columns
+
+
+def _parse_csv_columns(csv_file: str) -> Dict[str, _CompactColumn]:
+    """
+    Streams the csv row by row, appending each value's UTF-8 encoding to its column's buffer.
+    """
+    with open(csv_file, newline='', encoding="utf-8") as f:
+        reader = csv.reader(f)
+        field_names = next(reader)
+
+        buffers = [bytearray() for _ in field_names]
+        offsets = [array("q", [0]) for _ in field_names]
+
+        for row in reader:
+            for buffer, column_offsets, value in zip(buffers, offsets, row):
+                if value != "":
+                    buffer += value.encode("utf-8")
+                    column_offsets.append(len(buffer))
+
+    import numpy as np
+
+    columns = dict()
+    for name, buffer, column_offsets in zip(field_names, buffers, offsets):
+        # a column with a header but no values has nothing to sample, so it's left out
+        if len(column_offsets) == 1:
+            continue
+
+        columns[name] = _CompactColumn(np.frombuffer(buffer, dtype=np.uint8),
+                                       np.frombuffer(column_offsets, dtype=np.int64))
+
+    return columns
+
+
+def _hash_file(file: str) -> str:
+    sha = hashlib.sha256()
+    sha.update(_CACHE_MAGIC)
+
+    with open(file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+
+    return sha.hexdigest()[:32]
+
+
+def _write_cache(cache_file: str, columns: Dict[str, _CompactColumn]) -> None:
+    """
+    Writes every column's offsets and buffer into a single file, after a header listing where each column's sections
+    start. Like RandomDataGenerator's cache, the file is written to a temporary file then renamed, and failing to
+    write the cache is not an error.
+    """
+    sections = []
+    header = {"columns": []}
+    position = 0
+
+    for name, column in columns.items():
+        entry = {"name": name, "count": len(column)}
+
+        for section, data in (("offsets", column._offsets), ("buffer", column._buffer)):
+            entry[section] = position
+            sections.append(data)
+            position += _align(data.nbytes)
+
+        header["columns"].append(entry)
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(_CACHE_MAGIC) + 8 + len(header_bytes))
+
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(cache_file), delete=False) as f:
+            f.write(_CACHE_MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+            f.write(b"\0" * (data_start - f.tell()))
+
+            for section in sections:
+                f.write(section.data)
+                f.write(b"\0" * (_align(section.nbytes) - section.nbytes))
+
+        os.replace(f.name, cache_file)
+    except OSError:
+        pass
+
+
+def _read_cache_header(cache_file: str) -> Tuple[dict, int]:
+    """
+    @return: The cache's header, and where its first section starts.
+    @raises OSError: if the cache doesn't exist, or isn't a cache of this version.
+    """
+    with io.open(cache_file, "rb") as f:
+        if f.read(len(_CACHE_MAGIC)) != _CACHE_MAGIC:
+            raise OSError("%s is not a csv column cache" % cache_file)
+
+        header_size, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_size).decode("utf-8"))
+
+    return header, _align(len(_CACHE_MAGIC) + 8 + header_size)
+
+
+def _load_cache(cache_file: str) -> Dict[str, _CompactColumn]:
+    import numpy as np
+
+    header, data_start = _read_cache_header(cache_file)
+    mapped = np.memmap(cache_file, dtype=np.uint8, mode="r")
+
+    return {entry["name"]: _map_column(mapped, data_start, entry, cache_file, index)
+            for index, entry in enumerate(header["columns"])}
+
+
+def _load_cached_column(cache_file: str, index: int) -> _CompactColumn:
+    import numpy as np
+
+    header, data_start = _read_cache_header(cache_file)
+    mapped = np.memmap(cache_file, dtype=np.uint8, mode="r")
+
+    return _map_column(mapped, data_start, header["columns"][index], cache_file, index)
+
+
+def _map_column(mapped: np.memmap, data_start: int, entry: dict, cache_file: str, index: int) -> _CompactColumn:
+    import numpy as np
+
+    offsets_start = data_start + entry["offsets"]
+    offsets = mapped[offsets_start:offsets_start + 8 * (entry["count"] + 1)].view(np.int64)
+
+    buffer_start = data_start + entry["buffer"]
+    buffer = mapped[buffer_start:buffer_start + int(offsets[-1])]
+
+    return _CompactColumn(buffer, offsets, cache_file, index)
+
+
+def _align(size: int) -> int:
+    return -(-size // _CACHE_ALIGNMENT) * _CACHE_ALIGNMENT
@@ -0,0 +1,62 @@
+#
+# Copyright 2021 Open Raven Inc. and the Mockingbird project authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from collections import OrderedDict
+from importlib import import_module
+from typing import List
+
+# Every document type Mockingbird can generate, keyed by extension, in the order set_all_extensions selects them.
+# Document modules are only imported once their extension is used, so i.e generating csv files never imports pandas or
+# python-pptx.
+_DOCUMENT_TYPES = OrderedDict([
+    ("csv", ("structured_data_document.csv_document", "CSVDocument")),
+    ("json", ("structured_data_document.json_document", "JSONDocument")),
+    ("log", ("structured_data_document.log_document", "LogDocument")),
+    ("ods", ("structured_data_document.ods_document", "ODSDocument")),
+    ("xlsx", ("structured_data_document.panda_documents.xlsx_document", "XLSXDocument")),
+    ("yaml", ("structured_data_document.yaml_document", "YAMLDocument")),
+    ("avro", ("structured_data_document.panda_documents.avro_document", "AvroDocument")),
+    ("parquet", ("structured_data_document.panda_documents.parquet_document", "ParquetDocument")),
+    ("pptx", ("unstructured_data_document.pptx_document", "PPTXDocument")),
+    ("pdf", ("unstructured_data_document.pdf_document", "PDFDocument")),
+    ("docx", ("unstructured_data_document.docx_document", "DOCXDocument")),
+    ("txt", ("unstructured_data_document.txt_document", "TXTDocument")),
+])
+
+
+def get_extensions() -> List[str]:
+    """
+    @return: Every extension Mockingbird can generate, without importing any document type.
+    """
+    return list(_DOCUMENT_TYPES.keys())
+
+
+def get_document_class(extension: str) -> type:
+    """
+    Imports the document type generating the given extension.
+
+    @param extension: One of get_extensions().
+    @return: The document class, i.e CSVDocument for "csv".
+    """
+    assert extension in _DOCUMENT_TYPES, "extension %s not found in Mockingbird" % extension
+
+    module_name, class_name = _DOCUMENT_TYPES[extension]
+    document_class = getattr(import_module("." + module_name, __package__), class_name)
+
+    assert document_class.EXT == extension, "%s generates %s files, not %s" % (class_name, document_class.EXT,
+                                                                                 extension)
+
+    return document_class
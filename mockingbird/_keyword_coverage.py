@@ -0,0 +1,97 @@
+#
+# Copyright 2021 Open Raven Inc. and the Mockingbird project authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from itertools import combinations, product
+from typing import List, Tuple
+
+# product: every combination of keywords, one from each column.
+# each: every keyword appears in at least one group.
+# pairwise: every pair of keywords from two different columns appears together in at least one group.
+COVERAGE_MODES = ["product", "each", "pairwise"]
+
+
+def get_keyword_groups(keywords_groupings: List[List[str]], coverage: str = "product") -> List[Tuple[str, ...]]:
+    """
+    Schedules which keyword groups (one keyword from each column) get their own set of documents.
+
+    "product" takes every combination, which grows exponentially with the number of keywords per column. "each" and
+    "pairwise" take a small set of groups which still guarantees every keyword, or every pair of keywords across
+    columns, is tested. Groups are generated deterministically.
+
+    @param keywords_groupings: The keywords of each column, i.e [["ssn", "social security"], ["credit"]]
+    @param coverage: One of COVERAGE_MODES.
+    @return: A list of keyword groups, each holding a keyword from every column, in column order.
+    """
+    if coverage not in COVERAGE_MODES:
+        raise ValueError("Unknown coverage %s, expected one of %s" % (coverage, COVERAGE_MODES))
+
+    if coverage == "product":
+        return list(product(*keywords_groupings))
+
+    if coverage == "pairwise" and len(keywords_groupings) > 1:
+        return _get_pairwise_groups(keywords_groupings)
+
+    # Rotate through each column's keywords, so the widest column sets how many groups are needed.
+    group_count = max(len(keywords) for keywords in keywords_groupings)
+    return [tuple(keywords[i % len(keywords)] for keywords in keywords_groupings) for i in range(group_count)]
+
+
+def _get_pairwise_groups(keywords_groupings: List[List[str]]) -> List[Tuple[str, ...]]:
+    """
+    Greedily builds a covering array of strength two. Each group starts from the first uncovered pair, then fills in
+    every other column with the keyword covering the most uncovered pairs, so each group covers at least one new pair.
+    """
+    column_count = len(keywords_groupings)
+
+    # pairs of (column, keyword index), with the first column lower than the second
+    uncovered = set()
+    for first, second in combinations(range(column_count), 2):
+        for first_index, second_index in product(range(len(keywords_groupings[first])),
+                                                 range(len(keywords_groupings[second]))):
+            uncovered.add(((first, first_index), (second, second_index)))
+
+    groups = []
+    while uncovered:
+        (first, first_index), (second, second_index) = min(uncovered)
+
+        group = [None] * column_count
+        group[first] = first_index
+        group[second] = second_index
+
+        for column in range(column_count):
+            if group[column] is not None:
+                continue
+
+            def new_pairs(index):
+                return sum(_get_pair((column, index), (other, group[other])) in uncovered
+                           for other in range(column_count) if group[other] is not None)
+
+            # ties go to the lowest index, since max returns the first maximum
+            group[column] = max(range(len(keywords_groupings[column])), key=new_pairs)
+
+        uncovered.difference_update(((first, group[first]), (second, group[second]))
+                                    for first, second in combinations(range(column_count), 2))
+
+        groups.append(tuple(keywords_groupings[column][index] for column, index in enumerate(group)))
+
+    return groups
+
+
+def _get_pair(first: Tuple[int, int], second: Tuple[int, int]) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """
+    Orders two (column, keyword index) tuples into a pair, the lower column first.
+    """
+    return (first, second) if first[0] < second[0] else (second, first)
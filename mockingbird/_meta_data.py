@@ -16,10 +16,15 @@
 
 from __future__ import annotations
 
+import base64
 import io
 import json
 import os
 from collections import defaultdict
+from typing import TYPE_CHECKING, List
+
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class _MetaData:
@@ -33,40 +38,240 @@ class _MetaData:
     saving a single file to disk, but saves multiple __BaseDocument's to disk, this class allows the meta-data
     to be tracked upstream, so the parent-most __BaseDocument type can record it's child-class's meta-data
     changes.
+
+    Totals are kept as running aggregates as files are added. Optionally (see set_manifest_file), every file's
+    meta-data can be streamed to a JSON-lines manifest instead of being kept in memory, in which case only the totals
+    are held in memory, and the manifest holds everything written before a crash.
     """
 
     def __init__(self):
         self._meta_data_dict = dict()
         self._file_size_dict = dict()
+        self._locations_dict = dict()
+
+        # running aggregates over every added file
+        self._file_count = 0
+        self._total_size = 0
+        self._total_fabricated = defaultdict(int)
+
+        # keywords are consolidated as they're added, see consolidate_keywords
+        self._keyword_mappings = dict()
+
+        # the JSON-lines manifest, if streaming
+        self._manifest_file = None
+
+        # (index, count) if the meta-data only covers a single shard of a session
+        self._shard = None
+
+        # (coverage, keyword groups) when keywords were scheduled into groups, see set_keyword_coverage
+        self._keyword_coverage = None
+
+        # keyword to _ValueUsage, which of the keyword's sensitive-data values were used
+        self._value_usage = dict()
 
     def __len__(self):
-        return len(self._meta_data_dict)
+        return self._file_count
 
-    def add_data(self, file_name: str, fabricated_count: dict) -> None:
+    def add_data(self, file_name: str, fabricated_count: dict, sensitive_data_locations: dict = None,
+                 file_size: int = None) -> None:
         """
         Add a file to the known-collection of meta-data.
 
         @param file_name: Location of the outputted file.
         @param fabricated_count: A dictionary containing how many fabricated-types were injected into the file,
                                  i.e {"ssn": 50, "itin": 30}
+        @param sensitive_data_locations: Optional, a dictionary mapping keywords to a list of where in the file the
+                                         keyword's sensitive-data was placed, i.e {"ssn": [{"page": 1, "line": 4}]}
+        @param file_size: Optional, the size of the file in bytes if it's already known, otherwise the file is stat'd.
         """
-        assert file_name not in (
-                self._meta_data_dict or self._file_size_dict), "Error, filename %s has already been used." % file_name
-        # assert file_name not in self._file_size_dict, "Error, filename %s has already been used." % file_name
+        if file_size is None:
+            file_size = os.path.getsize(file_name)
+
+        if self._keyword_mappings:
+            fabricated_count = self.__consolidate(fabricated_count)
+            if sensitive_data_locations is not None:
+                sensitive_data_locations = self.__consolidate(sensitive_data_locations)
+
+        self._file_count += 1
+        self._total_size += file_size
+        for keyword, count in fabricated_count.items():
+            self._total_fabricated[keyword] += count
+
+        if self._manifest_file is not None:
+            # file names can't collide (see __BaseDocument's document names), so they aren't tracked when streaming
+            record = {"file": file_name, "size_bytes": file_size, "fabricated": fabricated_count}
+            if sensitive_data_locations is not None:
+                record["sensitive_data_locations"] = sensitive_data_locations
+
+            # opened per-file, so every line is on disk as soon as its file is
+            with io.open(self._manifest_file, "a", encoding="utf-8") as manifest:
+                manifest.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
 
-        file_size = os.path.getsize(file_name)
+        assert file_name not in self._meta_data_dict, "Error, filename %s has already been used." % file_name
 
         self._file_size_dict[file_name] = file_size
         self._meta_data_dict[file_name] = fabricated_count
 
+        if sensitive_data_locations is not None:
+            self._locations_dict[file_name] = sensitive_data_locations
+
+    def add_value_usage(self, keyword: str, value_count: int, indices: np.ndarray) -> None:
+        """
+        Records which of a keyword's sensitive-data values were used, so the meta-data can report how much of the
+        sensitive-data was covered.
+
+        @param keyword: The keyword the values belong to.
+        @param value_count: How many values the keyword has.
+        @param indices: The indices of the values used.
+        """
+        keyword = self._keyword_mappings.get(keyword, keyword)
+
+        if keyword not in self._value_usage:
+            self._value_usage[keyword] = _ValueUsage(value_count)
+
+        self._value_usage[keyword].add(indices)
+
     def add_other_meta_data(self, other: _MetaData) -> None:
         """
-        Migrates another _MetaData instance into the current one, by appending the other's dictionary.
-        @return:
+        Migrates another _MetaData instance into the current one, i.e a child document's, or one sent back from a
+        worker process. The other's already-measured sizes and counts are moved in bulk, and its running totals are
+        added to this one's, so no file is stat'd again, and the cost doesn't grow with how deeply documents nest.
+
+        Files are only added one at a time if they need consolidating, or streaming to a manifest.
+        """
+        assert other._manifest_file is None, "Can't migrate meta-data which was streamed to a manifest"
+
+        for keyword, usage in other._value_usage.items():
+            keyword = self._keyword_mappings.get(keyword, keyword)
+
+            if keyword not in self._value_usage:
+                self._value_usage[keyword] = _ValueUsage(usage.value_count)
+
+            self._value_usage[keyword].update(usage)
+
+        if self._keyword_mappings or self._manifest_file is not None:
+            for key in other._meta_data_dict.keys():
+                self.add_data(key, other._meta_data_dict[key], other._locations_dict.get(key),
+                              other._file_size_dict[key])
+            return
+
+        duplicates = self._meta_data_dict.keys() & other._meta_data_dict.keys()
+        assert not duplicates, "Error, filename %s has already been used." % min(duplicates)
+
+        self._meta_data_dict.update(other._meta_data_dict)
+        self._file_size_dict.update(other._file_size_dict)
+        self._locations_dict.update(other._locations_dict)
+
+        self._file_count += other._file_count
+        self._total_size += other._total_size
+        for keyword, count in other._total_fabricated.items():
+            self._total_fabricated[keyword] += count
+
+    def set_manifest_file(self, manifest_file: str) -> None:
+        """
+        Streams every file's meta-data to a JSON-lines manifest as it's added, rather than keeping it in memory. Each
+        line is a {"file", "size_bytes", "fabricated", "sensitive_data_locations"} record. Any existing manifest is
+        truncated, so the manifest only lists the files counted in the totals.
+
+        Must be set before any files are added.
+        """
+        assert self._file_count == 0, "The manifest must be set before any files are added"
+
+        manifest_folder = os.path.dirname(manifest_file)
+        if manifest_folder:
+            os.makedirs(manifest_folder, exist_ok=True)
+
+        # held absolute, so the manifest is found whatever the working directory is when the meta-data is dumped
+        self._manifest_file = os.path.abspath(manifest_file)
+
+        # files are appended one at a time as they're added, so start from an empty manifest
+        with io.open(self._manifest_file, "w", encoding="utf-8"):
+            pass
+
+    def set_keyword_coverage(self, coverage: str, keyword_groups: List[tuple]) -> None:
+        """
+        Records how keywords were scheduled into groups, each group getting its own set of documents, so the
+        meta-data states which keywords were tested together.
+
+        @param coverage: The coverage the groups guarantee, i.e "pairwise".
+        @param keyword_groups: Every keyword group documents were generated for.
+        """
+        self._keyword_coverage = (coverage, [list(keyword_group) for keyword_group in keyword_groups])
+
+    def set_shard(self, shard_index: int, shard_count: int) -> None:
+        """
+        Marks the meta-data as only covering shard_index of shard_count shards, see Mockingbird.set_shard.
+        """
+        self._shard = (shard_index, shard_count)
+
+    @classmethod
+    def from_meta_data(cls, meta_data: dict, meta_data_file: str = None) -> _MetaData:
+        """
+        Re-creates a _MetaData instance from a dictionary returned by get_meta_data (i.e a loaded meta-data file).
+        File sizes are taken from the dictionary, so the files themselves don't need to be present.
+
+        @param meta_data: The loaded meta-data.
+        @param meta_data_file: Optional, the file meta_data was loaded from. A relative manifest path is resolved
+                               against the file's folder, otherwise against the working directory.
+        """
+        instance = cls()
+
+        if "manifest_file" in meta_data:
+            # streamed meta-data only summarizes the files, every file is listed in the manifest
+            manifest_file = meta_data["manifest_file"]
+            if meta_data_file is not None:
+                manifest_file = os.path.join(os.path.dirname(os.path.abspath(meta_data_file)), manifest_file)
+
+            with io.open(manifest_file, encoding="utf-8") as manifest:
+                for line in manifest:
+                    record = json.loads(line)
+                    instance.add_data(record["file"], record["fabricated"], record.get("sensitive_data_locations"),
+                                      record["size_bytes"])
+
+        else:
+            locations = meta_data.get("sensitive_data_locations", dict())
+            for file_name, fabricated_count in meta_data["fabricated_files"].items():
+                instance.add_data(file_name, fabricated_count, locations.get(file_name),
+                                  meta_data["file_sizes_bytes"][file_name])
+
+        for keyword, coverage in meta_data.get("value_coverage", dict()).items():
+            # only shards list which values were used, which is all merging them needs
+            if "used_bitmap" in coverage:
+                instance._value_usage[keyword] = _ValueUsage.from_bitmap(coverage["values"], coverage["used_bitmap"])
+
+        if "keyword_coverage" in meta_data:
+            instance.set_keyword_coverage(meta_data["keyword_coverage"]["coverage"],
+                                          meta_data["keyword_coverage"]["keyword_groups"])
+
+        if "shard" in meta_data:
+            instance.set_shard(meta_data["shard"]["index"], meta_data["shard"]["count"])
+
+        return instance
+
+    @classmethod
+    def merge_shards(cls, shards: List[_MetaData]) -> _MetaData:
+        """
+        Merges the meta-data of every shard of a session into a single meta-data covering the whole session.
+
+        @raises ValueError: if a shard is missing, repeated, or the shards disagree on how many shards there are.
         """
+        shard_counts = set(shard._shard[1] if shard._shard else None for shard in shards)
+        if len(shard_counts) != 1 or None in shard_counts:
+            raise ValueError("Every meta-data file must come from the same sharded session, found shard counts %s"
+                             % shard_counts)
 
-        for key in other._meta_data_dict.keys():
-            self.add_data(key, other._meta_data_dict[key])
+        shard_count = shard_counts.pop()
+        shard_indices = sorted(shard._shard[0] for shard in shards)
+        if shard_indices != list(range(shard_count)):
+            raise ValueError("Expected shards 0 to %d exactly once, found %s" % (shard_count - 1, shard_indices))
+
+        merged = cls()
+        merged._keyword_coverage = shards[0]._keyword_coverage
+        for shard in sorted(shards, key=lambda other: other._shard[0]):
+            merged.add_other_meta_data(shard)
+
+        return merged
 
     def dump(self, output_file: str) -> None:
         """
@@ -74,8 +279,14 @@ class _MetaData:
 
         @param output_file: Location of output file.
         """
+        meta_data = self.get_meta_data()
+        if "manifest_file" in meta_data:
+            # relative to the meta-data file, so the output folder can be moved or merged from anywhere
+            meta_data["manifest_file"] = os.path.relpath(meta_data["manifest_file"],
+                                                         os.path.dirname(os.path.abspath(output_file)))
+
         with io.open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(self.get_meta_data(), f, ensure_ascii=False, indent=2)
+            json.dump(meta_data, f, ensure_ascii=False, indent=2)
 
     def consolidate_keywords(self, mappings: dict) -> None:
         """
@@ -110,18 +321,50 @@ class _MetaData:
                 _meta_data_dict["file.odt"] = {"ssn;social-security-number": 75}
 
 
+        Files added after consolidating are consolidated as they're added, so a streaming manifest can be
+        consolidated up-front.
+
         @param mappings: A with multiple many-to-one relationships between keywords.
         """
 
+        self._keyword_mappings = mappings
+
         for file_name in self._meta_data_dict.keys():
-            file_mappings = self._meta_data_dict[file_name]
-            new_mappings = dict()
+            self._meta_data_dict[file_name] = self.__consolidate(self._meta_data_dict[file_name])
+
+        for file_name in self._locations_dict.keys():
+            self._locations_dict[file_name] = self.__consolidate(self._locations_dict[file_name])
 
-            for key in file_mappings:
-                parent_key = mappings.get(key)
-                new_mappings[parent_key] = file_mappings[key]
+        total_fabricated = self.__consolidate(self._total_fabricated)
+        self._total_fabricated = defaultdict(int, total_fabricated)
 
-            self._meta_data_dict[file_name] = new_mappings
+        value_usage = dict()
+        for keyword, usage in self._value_usage.items():
+            keyword = mappings.get(keyword, keyword)
+
+            if keyword in value_usage:
+                value_usage[keyword].update(usage)
+            else:
+                value_usage[keyword] = usage
+
+        self._value_usage = value_usage
+
+    def __consolidate(self, keyword_dict: dict) -> dict:
+        """
+        Returns a copy of keyword_dict, with its keywords replaced using the consolidation mappings. Keywords which
+        don't have a mapping are kept as-is.
+        """
+        consolidated = dict()
+
+        for key, value in keyword_dict.items():
+            parent_key = self._keyword_mappings.get(key, key)
+
+            if parent_key in consolidated:
+                consolidated[parent_key] = consolidated[parent_key] + value
+            else:
+                consolidated[parent_key] = value
+
+        return consolidated
 
     def get_meta_data(self) -> dict:
         """
@@ -135,22 +378,109 @@ class _MetaData:
                  'fabricated_files': {'output.pdf': {'ssn': 10, 'itin': 5},
                                       'output.txt': {'ssn': 77, 'itin': 59}}
                  }
+
+                 Files that recorded where their sensitive-data was placed are also listed under
+                 'sensitive_data_locations'.
+                 When streaming to a manifest, 'fabricated_files' is replaced by 'manifest_file', the path of the
+                 manifest listing every file (dumped relative to the meta-data file).
+                 How many of each keyword's distinct sensitive-data values were used is listed under
+                 'value_coverage', along with (for a shard) a base64 bitmap of which values were used.
+                 Sessions scheduling keywords into groups list the groups, and the coverage they guarantee,
+                 under 'keyword_coverage'.
         """
 
         meta_data_dict = dict()
-        meta_data_dict["total_fabricated_files"] = len(self._meta_data_dict.keys())
-        meta_data_dict["total_size_bytes"] = sum(self._file_size_dict.values())
+        meta_data_dict["total_fabricated_files"] = self._file_count
+        meta_data_dict["total_size_bytes"] = self._total_size
+        meta_data_dict["total_fabricated_entries"] = dict(self._total_fabricated)
 
-        collective_fabricated_data = defaultdict(lambda: 0, dict())
-        for file in self._meta_data_dict.keys():
+        if self._manifest_file is not None:
+            meta_data_dict["manifest_file"] = self._manifest_file
+        else:
+            meta_data_dict["fabricated_files"] = self._meta_data_dict
+            meta_data_dict["file_sizes_bytes"] = self._file_size_dict
 
-            file_meta_data = self._meta_data_dict[file]
+        if self._locations_dict:
+            meta_data_dict["sensitive_data_locations"] = self._locations_dict
 
-            for data in file_meta_data:
-                collective_fabricated_data[data] += file_meta_data[data]
+        if self._value_usage:
+            meta_data_dict["value_coverage"] = dict()
 
-        meta_data_dict["total_fabricated_entries"] = dict(collective_fabricated_data)
-        meta_data_dict["fabricated_files"] = self._meta_data_dict
-        meta_data_dict["file_sizes_bytes"] = self._file_size_dict
+            for keyword, usage in self._value_usage.items():
+                coverage = {"values": usage.value_count, "used_values": usage.get_used_count()}
+
+                # shards also list which values were used, so merged shards can count the values any shard used
+                if self._shard is not None:
+                    coverage["used_bitmap"] = usage.get_bitmap()
+
+                meta_data_dict["value_coverage"][keyword] = coverage
+
+        if self._keyword_coverage is not None:
+            coverage, keyword_groups = self._keyword_coverage
+            meta_data_dict["keyword_coverage"] = {"coverage": coverage, "keyword_groups": keyword_groups}
+
+        if self._shard is not None:
+            meta_data_dict["shard"] = {"index": self._shard[0], "count": self._shard[1]}
 
         return meta_data_dict
+
+
+class _ValueUsage:
+    """
+    The distinct indices of a keyword's values that were used. Indices are collected in chunks, and only de-duplicated
+    once enough have built up, so merging the usage of many documents stays cheap.
+    """
+
+    def __init__(self, value_count: int):
+        self.value_count = value_count
+        self._chunks = []
+        self._pending = 0
+
+    def add(self, indices: np.ndarray) -> None:
+        self._chunks.append(indices)
+        self._pending += len(indices)
+
+        if self._pending > 2 * max(self.value_count, 1 << 16):
+            self.__compact()
+
+    def update(self, other: _ValueUsage) -> None:
+        for chunk in other._chunks:
+            self.add(chunk)
+
+    def get_used_count(self) -> int:
+        self.__compact()
+        return len(self._chunks[0]) if self._chunks else 0
+
+    def get_bitmap(self) -> str:
+        """
+        @return: A base64 encoded bitmap, with a set bit for each used value.
+        """
+        import numpy as np
+
+        used = np.zeros(self.value_count, dtype=bool)
+        for chunk in self._chunks:
+            used[chunk] = True
+
+        return base64.b64encode(np.packbits(used).tobytes()).decode("ascii")
+
+    @classmethod
+    def from_bitmap(cls, value_count: int, bitmap: str) -> _ValueUsage:
+        """
+        Re-creates the usage from a bitmap returned by get_bitmap.
+        """
+        import numpy as np
+
+        used = np.unpackbits(np.frombuffer(base64.b64decode(bitmap), dtype=np.uint8), count=value_count)
+
+        usage = cls(value_count)
+        usage.add(np.flatnonzero(used))
+
+        return usage
+
+    def __compact(self) -> None:
+        if self._chunks:
+            import numpy as np
+
+            self._chunks = [np.unique(np.concatenate(self._chunks))]
+
+        self._pending = len(self._chunks[0]) if self._chunks else 0
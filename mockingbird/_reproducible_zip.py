@@ -0,0 +1,58 @@
+#
+# Copyright 2021 Open Raven Inc. and the Mockingbird project authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import datetime
+import os
+import shutil
+import zipfile
+
+# Every entry is stamped with the earliest date a zip file can store, rather than the time it was written. Documents
+# storing a creation date (i.e xlsx) use the same date.
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+FIXED_DATETIME = datetime.datetime(*FIXED_DATE_TIME)
+
+
+class _ReproducibleZipFile(zipfile.ZipFile):
+    """
+    A ZipFile stamping every entry with a fixed date, rather than the current time (or a file's modified time), so
+    generating the same document twice produces a byte-identical archive. Entries added by ZipInfo are left as-is.
+    """
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        super().writestr(self.__get_zip_info(zinfo_or_arcname, compress_type), data, compress_type, compresslevel)
+
+    def write(self, filename, arcname=None, compress_type=None, compresslevel=None):
+        zinfo = self.__get_zip_info(arcname or os.path.basename(filename), compress_type)
+        zinfo.file_size = os.path.getsize(filename)
+
+        with open(filename, "rb") as source, self.open(zinfo, "w") as destination:
+            shutil.copyfileobj(source, destination, 1024 * 1024)
+
+    def open(self, name, mode="r", pwd=None, *, force_zip64=False):
+        if mode == "w":
+            name = self.__get_zip_info(name)
+
+        return super().open(name, mode, pwd, force_zip64=force_zip64)
+
+    def __get_zip_info(self, name, compress_type=None) -> zipfile.ZipInfo:
+        if isinstance(name, zipfile.ZipInfo):
+            return name
+
+        zinfo = zipfile.ZipInfo(name, date_time=FIXED_DATE_TIME)
+        zinfo.compress_type = self.compression if compress_type is None else compress_type
+        zinfo.external_attr = 0o600 << 16
+
+        return zinfo
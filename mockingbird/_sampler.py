@@ -0,0 +1,172 @@
+#
+# Copyright 2021 Open Raven Inc. and the Mockingbird project authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import hashlib
+import math
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Dict, List
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# uniform: every value is picked independently at random.
+# exhaustive: every value is picked once before any value is picked again.
+# weighted: values are picked at random, in proportion to their weight.
+SAMPLING_STRATEGIES = ["uniform", "exhaustive", "weighted"]
+
+
+class _SamplingPlan:
+    """
+    How the documents of a session pick their sensitive-data values. A plan is shared by every document in a session
+    (and sent along to worker processes), so that documents sample the values as a whole, rather than independently.
+
+    For exhaustive sampling, the plan fixes a single shuffled order of each keyword's values. Each document starts
+    walking the order where the documents before it are expected to finish (see __BaseDocument.get_expected_draws).
+    When the session is expected to pick fewer values than a keyword has, the starts are spread out over the whole
+    order, so a document picking more values than expected runs into the slack before the next document's stretch.
+    The shuffle is an affine permutation of the indices (position * a + b mod value count), so it costs nothing to
+    hold, however many values there are.
+    """
+
+    def __init__(self, strategy: str = "uniform", weights: Dict[str, List[float]] = None, seed: int = 0,
+                 track_coverage: bool = False):
+        """
+        @param strategy: One of SAMPLING_STRATEGIES.
+        @param weights: For weighted sampling, a dictionary of keyword to the weight of each of its values. Keywords
+                        without weights are sampled uniformly.
+        @param seed: Seeds the shuffled order of exhaustive sampling.
+        @param track_coverage: Whether documents record which values they picked. Always on for non-uniform
+                               strategies, which exist to control coverage.
+        @raises ValueError: if the strategy is unknown, or weighted sampling is missing weights.
+        """
+        if strategy not in SAMPLING_STRATEGIES:
+            raise ValueError("Unknown sampling strategy %s, expected one of %s" % (strategy, SAMPLING_STRATEGIES))
+
+        if strategy == "weighted" and not weights:
+            raise ValueError("Weighted sampling requires weights")
+
+        self.strategy = strategy
+        self.weights = weights
+        self.track_coverage = track_coverage or strategy != "uniform"
+
+        # how many values the session's documents are expected to pick for each keyword, set when the session plans
+        # its documents
+        self.expected_draws = None
+
+        self._seed = seed
+        self._cumulative_weights = dict()
+
+        import numpy as np
+
+        for keyword, keyword_weights in (weights or dict()).items():
+            cumulative_weights = np.cumsum(np.asarray(keyword_weights, dtype=np.float64))
+            if len(cumulative_weights) == 0 or not cumulative_weights[-1] > 0:
+                raise ValueError("The weights of %s must add up to more than zero" % keyword)
+
+            self._cumulative_weights[keyword] = cumulative_weights
+
+    def get_sampler(self, keyword: str, value_count: int, start: float) -> _Sampler:
+        """
+        @param keyword: The keyword values are sampled for.
+        @param value_count: How many values the keyword has.
+        @param start: How many values the documents before this one are expected to pick, which is where the
+                      document starts walking the exhaustive order (wrapping around value_count).
+        @return: A sampler of indices into the keyword's values.
+        """
+        if self.strategy == "weighted" and keyword in self._cumulative_weights:
+            cumulative_weights = self._cumulative_weights[keyword]
+            assert len(cumulative_weights) == value_count, \
+                "%s has %d values, but %d weights" % (keyword, value_count, len(cumulative_weights))
+
+            return _WeightedSampler(cumulative_weights)
+
+        if self.strategy == "exhaustive":
+            import numpy as np
+
+            keyword_hash = int.from_bytes(hashlib.sha256(keyword.encode("utf-8")).digest()[:8], "little")
+            rng = np.random.default_rng([self._seed, keyword_hash])
+
+            stretch = max(1.0, value_count / self.expected_draws) if self.expected_draws else 1.0
+            return _ExhaustiveSampler(value_count, int(start * stretch) % value_count, rng)
+
+        return _UniformSampler(value_count)
+
+
+class _Sampler(ABC):
+    """
+    Samples indices into a keyword's values, in batches.
+    """
+
+    @abstractmethod
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        @param n: How many indices to sample.
+        @param rng: The sampling document's random generator.
+        @return: An int64 array of n indices.
+        """
+        pass
+
+
+class _UniformSampler(_Sampler):
+
+    def __init__(self, value_count: int):
+        self._value_count = value_count
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        return rng.integers(0, self._value_count, size=n)
+
+
+class _WeightedSampler(_Sampler):
+
+    def __init__(self, cumulative_weights: np.ndarray):
+        self._cumulative_weights = cumulative_weights
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        import numpy as np
+
+        # binary search each draw into the cumulative weights, rather than building an n by value_count table
+        draws = rng.random(n) * self._cumulative_weights[-1]
+        indices = np.searchsorted(self._cumulative_weights, draws, side="right")
+
+        return np.minimum(indices, len(self._cumulative_weights) - 1)
+
+
+class _ExhaustiveSampler(_Sampler):
+    """
+    Walks a shuffled order of the indices, wrapping back around once every index has been picked. Stateful, so
+    documents sharing the sampler (i.e the styles of a document) carry on from each other.
+    """
+
+    def __init__(self, value_count: int, start: int, rng: np.random.Generator):
+        self._value_count = value_count
+        self._position = start
+
+        # any multiplier co-prime with value_count makes the affine map a permutation
+        self._multiplier = int(rng.integers(1, max(value_count, 2)))
+        while math.gcd(self._multiplier, value_count) != 1:
+            self._multiplier -= 1
+
+        self._offset = int(rng.integers(0, value_count))
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        import numpy as np
+
+        positions = (self._position + np.arange(n, dtype=np.int64)) % self._value_count
+        self._position = (self._position + n) % self._value_count
+
+        return (positions * self._multiplier + self._offset) % self._value_count
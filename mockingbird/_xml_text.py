@@ -0,0 +1,33 @@
+#
+# Copyright 2021 Open Raven Inc. and the Mockingbird project authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import re
+from xml.sax.saxutils import escape
+
+# characters XML 1.0 doesn't allow anywhere in a document, escaped or not, i.e most control characters
+_XML_INVALID_CHARACTERS = re.compile("[^\x09\x0A\x0D\x20-\uD7FF\uE000-\uFFFD\U00010000-\U0010FFFF]")
+
+
+def escape_xml_text(text: str, entities: dict = None) -> str:
+    """
+    Escapes text for an xml document, like xml.sax.saxutils.escape, after dropping any characters XML can't hold.
+    Writing those characters (even escaped) would make the whole document unreadable.
+
+    @param text: The text to escape.
+    @param entities: Optional, extra characters to replace, as in xml.sax.saxutils.escape.
+    @return: The escaped text.
+    """
+    return escape(_XML_INVALID_CHARACTERS.sub("", text), entities or {})
@@ -14,14 +14,22 @@
 # limitations under the License.
 #
 
-import csv
-from collections import defaultdict
-from itertools import product
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from tempfile import NamedTemporaryFile
-from typing import List
+from typing import TYPE_CHECKING, List, Tuple
+
+from . import Mockingbird, _save_child_document
+from ._meta_data import _MetaData
+from ._config_registry import get_config
+from ._csv_columns import load_csv_columns
+from ._keyword_coverage import get_keyword_groups
+from ._sampler import _SamplingPlan
 
-from . import Mockingbird
-from .mockaroo_csv_api import MockarooCsvAPI
+if TYPE_CHECKING:
+    import numpy as np
 
 
 class MockingbirdFromCSV(Mockingbird):
@@ -61,23 +69,31 @@ class MockingbirdFromCSV(Mockingbird):
         (ssn, credit) & (social-security, credit)
 
     These tuples will all get their own set of documents to generate, ensuring that each unique keyword combination
-    gets tested against every other set of keywords. As for meta-data for all these files, once finished,
-    the meta-data object will somewhat undo this process (in the meta-data), by consolidating split keywords back into
-    their original ";" separated form.
+    gets tested against every other set of keywords. Since the number of tuples grows exponentially with the number of
+    keywords, coverage can instead be set to "each" (every keyword is in at least one tuple) or "pairwise" (every
+    pair of keywords from different columns is in at least one tuple), which only need a handful of tuples. As for
+    meta-data for all these files, once finished, the meta-data object will somewhat undo this process (in the
+    meta-data), by consolidating split keywords back into their original ";" separated form.
 
     Once loaded, each column will be loaded into key-value pairs, with the key being the column header, and the values
     being sensitive-data to be injected into documents, and will generate documents for each unique permutation of
     keys.
     """
 
-    def __init__(self, csv_file: str) -> None:
+    def __init__(self, csv_file: str, workers=1, seed=None, coverage="product") -> None:
         """
         @param csv_file: String pointing to a csv file.
+        @param workers: How many worker processes to generate documents with, shared by every keyword-permutation
+                        session.
+        @param seed: Optional, an int seeding every keyword-permutation session, see Mockingbird.
+        @param coverage: How keyword permutations are scheduled, one of "product", "each" or "pairwise". The coverage
+                         and permutations are recorded in the meta-data.
         """
 
         # Parse the csv into a dictionary, such that column headers == keys, and values == remainder of the column.
-        super().__init__()
-        csv_dictionary = self.__parse_csv_into_dictionary(csv_file)
+        # Each column is held in a compact, array-backed form, since sample csv's can hold millions of values.
+        super().__init__(workers=workers, seed=seed)
+        csv_dictionary = load_csv_columns(csv_file, get_config()["csv_input"]["cache_min_bytes"])
 
         """
         Split each key up into subkeys using the ; delimiter (this is how csv's are to be inputted), then
@@ -92,8 +108,8 @@ class MockingbirdFromCSV(Mockingbird):
                 self.__pii_dictionary[subkey] = csv_dictionary[key]
 
         """
-        Generate a cross-product list of every keyword combination (one from each grouping). This ensures each keyword
-        gets tested individually in it's own set of documents.
+        Generate a list of keyword combinations (one from each grouping), by default the cross-product of every
+        combination. This ensures each keyword gets tested individually in it's own set of documents.
         """
         keywords_groupings = []
         self.__reverse_mapping = dict()  # Used for collecting meta-data
@@ -104,50 +120,76 @@ class MockingbirdFromCSV(Mockingbird):
             for subkey in keywords:
                 self.__reverse_mapping[subkey] = key
 
-        self.keyword_permutations = list(product(*keywords_groupings))
+        self.keyword_permutations = get_keyword_groups(keywords_groupings, coverage)
+        self._meta_data_object.set_keyword_coverage(coverage, self.keyword_permutations)
 
     def save(self, save_path: str) -> None:
 
+        # consolidated up-front, so a streaming manifest is written with the consolidated keywords
+        self._meta_data_object.consolidate_keywords(self.__reverse_mapping)
+
+        if self._workers > 1:
+            self.__save_parallel(save_path)
+            return
+
         # Run and create a Mockingbird instance for every keyword permutation produced, to test each
         # keyword against all possible keyword combinations.
         for keyword_group in self.keyword_permutations:
-            session = Mockingbird()
-            session.set_file_extensions(self._file_extensions)
-
-            for keyword in keyword_group:
-                session.add_sensitive_data(keyword=keyword, entries=self.__pii_dictionary[keyword])
-
+            session = self.__create_session(keyword_group)
             session.save(save_path=save_path)
 
             # record each sessions meta-data into a even bigger meta-data object
             self._meta_data_object.add_other_meta_data(session._meta_data_object)
 
-        self._meta_data_object.consolidate_keywords(self.__reverse_mapping)
-
-    @staticmethod
-    def __parse_csv_into_dictionary(csv_file: str) -> dict:
+    def __save_parallel(self, save_path: str) -> None:
+        """
+        Same as the serial loop in save(), except the documents of every keyword-permutation session are planned up
+        front, then all scheduled onto a single pool of worker processes, so small sessions don't leave workers idle.
+        Each worker is handed a read-only copy of the sensitive-data once, when it starts, and documents only refer to
+        their keywords. Documents keep the seeds their session would give them, so the output is identical to
+        saving each session in turn.
         """
-        Loads the csv file into a dictionary of arrays, removing empty string entries, i.e,
+        work_list = []
+        for keyword_group in self.keyword_permutations:
+            session = self.__create_session(keyword_group)
+            session_work_list, seeds, sampling_starts = session._plan_documents()
+
+            for (child_class, file_limit), seed, sampling_start in zip(session_work_list, seeds, sampling_starts):
+                work_list.append((child_class, file_limit, seed, keyword_group, session._sampling_plan,
+                                  sampling_start))
+
+        # Hand out work in chunks to cut down on inter-process overhead, while keeping every worker busy.
+        chunk_size = max(1, len(work_list) // (self._workers * 4))
 
-            1 social security
-            2 355-555-555
-            3 222-222-222
+        with ProcessPoolExecutor(max_workers=self._workers, initializer=_set_worker_sensitive_data,
+                                 initargs=(self.__pii_dictionary,)) as executor:
+            results = executor.map(_save_keyword_document,
+                                   *zip(*work_list),
+                                   repeat(save_path),
+                                   chunksize=chunk_size)
 
-            ->
+            for child_meta_data in results:
+                self._meta_data_object.add_other_meta_data(child_meta_data)
 
-            {"social security": ["355-555-555", "222-222-222"], ...}
+    def __create_session(self, keyword_group: Tuple[str, ...]) -> Mockingbird:
         """
+        Creates the Mockingbird session generating the documents for a single keyword permutation. Sessions must be
+        created in permutation order, since each is seeded from this instance.
+        """
+        session = Mockingbird(file_minimum=self._file_minimum, workers=self._workers, file_count=self._file_count,
+                              seed=self._spawn_seed())
+        session.set_file_extensions(self._file_extensions)
+
+        if self._shard is not None:
+            session.set_shard(*self._shard)
 
-        csv_dictionary = defaultdict(lambda: [], dict())
-        with open(csv_file, newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                for name in reader.fieldnames:
-                    row_value = row[name]
-                    if row_value != "":
-                        csv_dictionary[name].append(row[name])
+        for keyword in keyword_group:
+            session.add_sensitive_data(keyword=keyword, entries=self.__pii_dictionary[keyword])
 
-        return csv_dictionary
+        session.set_sampling_strategy(self._sampling_plan.strategy, self._sampling_plan.weights,
+                                      self._sampling_plan.track_coverage)
+
+        return session
 
 
 class MockingbirdFromMockaroo(MockingbirdFromCSV):
@@ -156,9 +198,9 @@ class MockingbirdFromMockaroo(MockingbirdFromCSV):
     api, get back a CSV file, and plug it right into MockingbirdFromCSV.
     """
 
-    def __init__(self, api_key: str, schema_request: List[dict]):
+    def __init__(self, api_key: str, schema_request: List[dict], workers=1, seed=None, coverage="product"):
         # Load Config
-        mockaroo_config = load_yaml_settings("_default_config.yml")
+        mockaroo_config = get_config()
         csv_endpoint = mockaroo_config["external_api"]["mockaroo_api"]["csv_endpoint"]
         row_count = mockaroo_config["external_api"]["mockaroo_api"]["row_count"]
 
@@ -166,10 +208,43 @@ class MockingbirdFromMockaroo(MockingbirdFromCSV):
         temp = NamedTemporaryFile(mode="wb")
 
         # Making a Mockaroo Session
+        # only imported when needed, since it imports requests
+        from .mockaroo_csv_api import MockarooCsvAPI
+
         mockaroo = MockarooCsvAPI(api_key=api_key, row_count=row_count, mockaroo_api_endpoint=csv_endpoint)
         mockaroo.post_and_save_from_dict(fields=schema_request,
                                          output_path=temp.name)  # Get CSV file from mockaroo and save to temp.name
 
         # Call Super with the now-saved temporary CSV file
-        super(MockingbirdFromMockaroo, self).__init__(csv_file=temp.name)
+        super(MockingbirdFromMockaroo, self).__init__(csv_file=temp.name, workers=workers, seed=seed,
+                                                      coverage=coverage)
         temp.close()
+
+
+# The sensitive-data of a MockingbirdFromCSV, set once in each worker process by the pool's initializer.
+_worker_sensitive_data = dict()
+
+
+def _set_worker_sensitive_data(sensitive_data: dict) -> None:
+    global _worker_sensitive_data
+    _worker_sensitive_data = sensitive_data
+
+
+def _save_keyword_document(child_class, file_limit: int, seed: np.random.SeedSequence, keyword_group: Tuple[str, ...],
+                           sampling_plan: _SamplingPlan, sampling_start: float, save_path: str) -> _MetaData:
+    """
+    Saves a single child-document of a keyword-permutation session inside a worker process, injecting the worker's
+    sensitive-data for the permutation's keywords.
+
+    @return: The _MetaData of the saved child-document.
+    """
+    sensitive_data_mappings = {keyword: _worker_sensitive_data[keyword] for keyword in keyword_group}
+
+    return _save_child_document(child_class=child_class,
+                                file_limit=file_limit,
+                                seed=seed,
+                                config_file=None,
+                                sensitive_data_mappings=sensitive_data_mappings,
+                                sampling_plan=sampling_plan,
+                                sampling_start=sampling_start,
+                                save_path=save_path)
@@ -1,47 +1,153 @@
 import glob
+import hashlib
 import os
 import pathlib
 import random
 import re
-from typing import Set
+import tempfile
+from typing import TYPE_CHECKING, List, Set
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Bump whenever the way the data set is built changes, so stale caches are not re-used.
+_CACHE_VERSION = 1
+
+
+def _get_cache_dir() -> str:
+    """
+    Returns the folder Mockingbird caches pre-built data in. Can be overridden with the MOCKINGBIRD_CACHE_DIR
+    environment variable, otherwise follows XDG_CACHE_HOME (defaulting to ~/.cache).
+    """
+    cache_dir = os.environ.get("MOCKINGBIRD_CACHE_DIR")
+
+    if not cache_dir:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(cache_home, "mockingbird")
+
+    return cache_dir
 
 
 class RandomDataGenerator:
 
-    def __init__(self, glob_path=None, random_int_upper_bound=50):
+    def __init__(self, glob_path=None, random_int_upper_bound=50, cache_dir=None):
         """
-        Loads the files found in folder_path and puts them into memory to be used as random seed data to be embedded
-        within various documents.
+        Points to the files found in glob_path, which are used as random seed data to be embedded within various
+        documents. Nothing is loaded until data_set is first accessed, at which point the words are read from a
+        pre-built cache (keyed by a hash of the files), or extracted from the files and cached for next time.
         """
         if glob_path is None:
             glob_path = os.path.join(pathlib.Path(__file__).parent.absolute(), "./books/*.txt")
 
-        word_set = self.__extract_strings_from_folder(glob_path)
-        number_set = self.__generate_number_set(len(word_set), random_int_upper_bound)
+        if cache_dir is None:
+            cache_dir = _get_cache_dir()
+
+        self._glob_path = glob_path
+        self._random_int_upper_bound = random_int_upper_bound
+        self._cache_dir = cache_dir
+        self.__data_set = None
+        self.__data_array = None
+
+    @property
+    def data_set(self) -> List[str]:
+        """
+        The list of random words and numbers, loaded on first access.
+        """
+        if self.__data_set is None:
+            self.__data_set = self.__load_data_set()
+
+        return self.__data_set
+
+    @property
+    def data_array(self) -> "np.ndarray":
+        """
+        data_set as a numpy object array, so many random words can be picked at once using an array of indices.
+        """
+        if self.__data_array is None:
+            import numpy as np
+
+            self.__data_array = np.array(self.data_set, dtype=object)
+
+        return self.__data_array
+
+    def __load_data_set(self) -> List[str]:
+        """
+        Loads the data set from the on-disk cache, building (and caching) it if it doesn't exist yet.
+        """
+        list_of_files = sorted(glob.glob(self._glob_path))
+        digest = self.__hash_files(list_of_files)
+        cache_file = os.path.join(self._cache_dir, "corpus-%s.bin" % digest)
+
+        try:
+            with open(cache_file, "rb") as f:
+                return f.read().decode("utf-8").split("\n")
+        except OSError:
+            pass
+
+        data_set = self.__build_data_set(list_of_files, digest)
+        self.__write_cache(cache_file, data_set)
+
+        return data_set
+
+    def __build_data_set(self, list_of_files: List[str], digest: str) -> List[str]:
+        """
+        Extracts the words from the files, and pads them with the same number of random numbers. The numbers are drawn
+        from a generator seeded with the files' digest, so a re-built cache has the exact same contents.
+        """
+        word_set = self.__extract_strings_from_files(list_of_files)
+        number_set = self.__generate_number_set(len(word_set), self._random_int_upper_bound, random.Random(digest))
+
+        return sorted(word_set.union(number_set))
+
+    def __hash_files(self, list_of_files: List[str]) -> str:
+        """
+        Hashes the contents of every file, along with anything else the data set depends on.
+        """
+        sha = hashlib.sha256()
+        sha.update(("%d:%d" % (_CACHE_VERSION, self._random_int_upper_bound)).encode("utf-8"))
 
-        self.data_set = list(word_set.union(number_set))
+        for file in list_of_files:
+            sha.update(os.path.basename(file).encode("utf-8"))
+            with open(file, "rb") as f:
+                sha.update(f.read())
+
+        return sha.hexdigest()[:32]
 
     @staticmethod
-    def __generate_number_set(count: int, upper_bound: int) -> Set[str]:
+    def __write_cache(cache_file: str, data_set: List[str]) -> None:
+        """
+        Writes the data set as a newline separated blob. Words never contain whitespace, so the separator is safe.
+        The file is written to a temporary file first then renamed, so concurrent processes never read a partial cache.
+        Failing to write the cache (i.e a read-only home directory) is not an error, the data set just gets re-built
+        next time.
+        """
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(cache_file), delete=False) as f:
+                f.write("\n".join(data_set).encode("utf-8"))
+            os.replace(f.name, cache_file)
+        except OSError:
+            pass
+
+    @staticmethod
+    def __generate_number_set(count: int, upper_bound: int, rng: random.Random) -> Set[str]:
 
         number_set = set()
 
         while len(number_set) < count:
-            number_set.add(str(random.getrandbits(random.randint(1, upper_bound))))
+            number_set.add(str(rng.getrandbits(rng.randint(1, upper_bound))))
 
         return number_set
 
     @staticmethod
-    def __extract_strings_from_folder(glob_path: str) -> Set[str]:
+    def __extract_strings_from_files(list_of_files: List[str]) -> Set[str]:
         """
-        Load each glob item into memory, parse into words, and remove anything that's not numerical or alphabetical.
-        :param glob_path: A glob styled path
-        :return: A set of words from the glob path.
+        Load each file into memory, parse into words, and remove anything that's not numerical or alphabetical.
+        :param list_of_files: A list of file paths.
+        :return: A set of words from the files.
         """
         word_set = set()
 
-        list_of_files = glob.glob(glob_path)
-
         for file in list_of_files:
 
             with open(file, "r") as f:
@@ -8,6 +8,7 @@ from typing import Dict, Tuple
 import numpy as np
 
 from .. import Mockingbird
+from .._config_registry import get_config, thaw_config
 
 
 def mb_to_b_conversion(size: float) -> float:
@@ -54,7 +55,7 @@ class SizedConfigMaker:
         self._sample_size = 15
         self._sample_distance = 4
         self._start_at = 50
-        self._base_config = Mockingbird()._configurable_dict
+        self._base_config = thaw_config(get_config())
 
         if not lookup_table_path:
             self._lookup_table_path = os.path.join(pathlib.Path(__file__).parent.absolute(), "lookup_table.csv")
@@ -171,7 +172,7 @@ class SizedConfigMaker:
         :param delta: How much to scale the parameters by.
         :return: A configuration with adjustable parameters scaled by a "delta" amount.
         """
-        new_config = copy.copy(self._base_config)
+        new_config = copy.deepcopy(self._base_config)
         new_config["base_structured_data"]["entries_range"] = [self._start_at + (delta * 100),
                                                                self._start_at + 1 + (delta * 100)]
         new_config["base_structured_data"]["dictionary_range"] = [50, 51]  # note, this can be adjusted as well.
@@ -16,12 +16,55 @@
 
 from abc import ABC, abstractmethod
 from collections import OrderedDict
-from random import randint
-from typing import List
+from typing import Dict, Iterator, List
+
+import numpy as np
 
 from ..__base import __BaseDocument
 
 
+class _StructuredTable:
+    """
+    A column-oriented table of structured-data. Each column is a numpy object array, and every column has the same
+    length. Writers can consume the columns directly, or iterate over the table row by row.
+
+    sensitive_columns maps the index of every column filled with sensitive-data to its keyword.
+    """
+
+    def __init__(self, header: List[str], columns: List[np.ndarray], sensitive_columns: Dict[int, str] = None):
+        assert len(header) == len(columns), "Each column needs a header"
+
+        self.header = header
+        self.columns = columns
+        self.sensitive_columns = sensitive_columns or dict()
+
+    def __len__(self):
+        if not self.columns:
+            return 0
+
+        return len(self.columns[0])
+
+    def column_dict(self) -> OrderedDict:
+        """
+        Maps each header to its column. Like the row dictionaries, a repeated header keeps its first position and its
+        last column.
+        """
+        return OrderedDict(zip(self.header, self.columns))
+
+    def values(self) -> Iterator[tuple]:
+        """
+        Iterates over the table's rows as tuples of values.
+        """
+        return zip(*self.columns)
+
+    def rows(self) -> Iterator[OrderedDict]:
+        """
+        Iterates over the table's rows as ordered dictionaries, mapping each header to the row's value.
+        """
+        for row in self.values():
+            yield OrderedDict(zip(self.header, row))
+
+
 class __BaseStructuredDataType(__BaseDocument, ABC):
     """
     Create an array of dictionaries which can be used to organized structured-data documents. Since most structured
@@ -30,9 +73,9 @@ class __BaseStructuredDataType(__BaseDocument, ABC):
     """
 
     @abstractmethod
-    def __init__(self, extension=None, config_file=None):
+    def __init__(self, extension=None, config_file=None, seed=None):
 
-        super().__init__(extension=extension, config_file=config_file)
+        super().__init__(extension=extension, config_file=config_file, seed=seed)
         # member variables declaration
         self._dictionary_size: int
         self._entries_range: int
@@ -40,11 +83,14 @@ class __BaseStructuredDataType(__BaseDocument, ABC):
 
         # how many entries each dictionary gets
         dictionary_range = (self._configurable_dict["base_structured_data"]["dictionary_range"])
-        self._dictionary_size = randint(dictionary_range[0], dictionary_range[1])
+        self._dictionary_size = self._random.randint(dictionary_range[0], dictionary_range[1])
 
         # how many dictionary-entries to include
         entries_range = (self._configurable_dict["base_structured_data"]["entries_range"])
-        self._entries_range = randint(entries_range[0], entries_range[1])
+        self._entries_range = self._random.randint(entries_range[0], entries_range[1])
+
+        # how many rows to generate at once when streaming rows to a file
+        self._stream_chunk_size = self._configurable_dict["base_structured_data"]["stream_chunk_size"]
 
     # Abstract Methods #
 
@@ -52,55 +98,96 @@ class __BaseStructuredDataType(__BaseDocument, ABC):
     def save(self, save_path: str) -> None:
         pass
 
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        """
+        Every file holds a table with a column of values for each keyword, the average table having the middle of
+        entries_range rows.
+        """
+        entries_range = configurable_dict["base_structured_data"]["entries_range"]
+        return file_limit * (entries_range[0] + entries_range[1]) / 2
+
     # Protected Methods #
 
-    def _get_structured_data(self) -> List[dict]:
+    def _get_structured_table(self) -> _StructuredTable:
         """
-        Create a list of dictionaries containing sensitive-data in one of the locations. Each dictionary is well ordered
-        in order to ensure charts / spreadsheet's rows will be consistent across.
+        Create a column-oriented table containing sensitive-data in one of the columns. All the random clutter for
+        the table is drawn in one batch, and the sensitive columns are placed by their index.
         """
 
-        structured_array = []
         pii_entries = self._get_embedded_positions()
 
         # keep each row having the same keyword entry
-        header_keywords = []
-        for x in range(self._dictionary_size):
-            header_keywords.append(self._get_random_word())
+        header_keywords = self._get_n_random_words(self._dictionary_size)
+
+        return self.__build_table(header_keywords, pii_entries, self._entries_range)
+
+    def _iter_structured_tables(self, chunk_size: int = None) -> Iterator[_StructuredTable]:
+        """
+        Same as _get_structured_table, except the table is generated and yielded in chunks of at most chunk_size rows,
+        so writers can stream a table of any size to disk. Every chunk has the same header and sensitive columns.
+
+        @param chunk_size: Maximum rows per chunk, defaults to the configured stream_chunk_size.
+        """
+
+        if chunk_size is None:
+            chunk_size = self._stream_chunk_size
 
-        for item in range(self._entries_range):
+        pii_entries = self._get_embedded_positions()
+        header_keywords = self._get_n_random_words(self._dictionary_size)
 
-            ordered_dict = OrderedDict()
-            for x in range(self._dictionary_size):
+        for start in range(0, self._entries_range, chunk_size):
+            yield self.__build_table(header_keywords, pii_entries, min(chunk_size, self._entries_range - start))
 
-                if x in pii_entries:
-                    keyword = pii_entries[x]
-                    ordered_dict[keyword] = self._get_sensitive_data(keyword=keyword)
+    def _iter_structured_tables_no_sensitive_info(self, chunk_size: int = None) -> Iterator[_StructuredTable]:
+        """
+        Used to create empty tables, the same as _iter_structured_tables, except the junk tables contain no sensitive
+        information.
+        """
 
-                else:
-                    ordered_dict[header_keywords[x]] = self._get_random_word()
+        if chunk_size is None:
+            chunk_size = self._stream_chunk_size
 
-            structured_array.append(ordered_dict)
+        header_keywords = self._get_n_random_words(self._dictionary_size)
 
-        return structured_array
+        for start in range(0, self._entries_range, chunk_size):
+            yield self.__build_table(header_keywords, dict(), min(chunk_size, self._entries_range - start))
 
-    def _get_structured_data_no_sensitive_info(self) -> list:
+    def _iter_structured_rows(self, chunk_size: int = None) -> Iterator[OrderedDict]:
         """
-        Used to create empty tables - returns a junk dictionary containing no sensitive information.
+        Streams the rows of the table as ordered dictionaries, see _iter_structured_tables.
         """
 
-        structured_array = []
+        for structured_table in self._iter_structured_tables(chunk_size):
+            yield from structured_table.rows()
+
+    # Private Methods #
+
+    def __build_table(self, header_keywords: List[str], pii_entries: Dict[int, str],
+                      row_count: int) -> _StructuredTable:
+        """
+        Builds a table with a column for each header keyword and row_count rows. Columns found in pii_entries
+        are filled with that keyword's sensitive-data, the rest are filled with random words.
+        """
 
-        header_keywords = []
-        for x in range(self._entries_range):
-            header_keywords.append(self._get_random_word())
+        filler_count = sum(1 for x in range(len(header_keywords)) if x not in pii_entries)
+        filler = self._get_random_word_array((filler_count, row_count))
 
-        for item in range(self._entries_range):
+        header = []
+        columns = []
+        sensitive_columns = dict()
+        filler_index = 0
+        for x in range(len(header_keywords)):
 
-            ordered_dict = OrderedDict()
-            for x in range(self._entries_range):
-                ordered_dict[header_keywords[x]] = self._get_random_word()
+            if x in pii_entries:
+                keyword = pii_entries[x]
+                header.append(keyword)
+                columns.append(self._get_n_sensitive_data(keyword=keyword, n=row_count))
+                sensitive_columns[x] = keyword
 
-            structured_array.append(ordered_dict)
+            else:
+                header.append(header_keywords[x])
+                columns.append(filler[filler_index])
+                filler_index += 1
 
-        return structured_array
+        return _StructuredTable(header, columns, sensitive_columns)
@@ -13,18 +13,3 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-
-from .csv_document import CSVDocument
-from .json_document import JSONDocument
-from .log_document import LogDocument
-from .ods_document import ODSDocument
-from .panda_documents.avro_document import AvroDocument
-from .panda_documents.parquet_document import ParquetDocument
-from .panda_documents.xlsx_document import XLSXDocument
-from .yaml_document import YAMLDocument
-
-__all__ = ['CSVDocument', 'JSONDocument', 'LogDocument', 'ODSDocument', 'XLSXDocument', 'YAMLDocument',
-           'AvroDocument', 'ParquetDocument']
-
-__all_classes__ = [CSVDocument, JSONDocument, LogDocument, ODSDocument, XLSXDocument, YAMLDocument,
-                   AvroDocument, ParquetDocument]
@@ -24,32 +24,28 @@ class CSVDocument(__BaseStructuredDataType):
     EXT = "csv"
 
     @final
-    def __init__(self, config_file=None):
-        super().__init__(extension=CSVDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=CSVDocument.EXT, config_file=config_file, seed=seed)
 
     @final
     def save(self, save_path: str) -> None:
         """
-        Writes the structured data into a csv file.
+        Streams the structured data into a csv file, one chunk of rows at a time.
         """
 
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
 
-        output_file = open(save_file, 'w')
-        csv_output = csv.writer(output_file)
+        with open(save_file, 'w') as output_file:
+            csv_output = csv.writer(output_file)
 
-        first_row = True
-        structured_array = self._get_structured_data()
+            first_chunk = True
+            for structured_table in self._iter_structured_tables():
+                if first_chunk:
+                    # write header first
+                    csv_output.writerow(structured_table.header)
+                    first_chunk = False
 
-        for line in structured_array:
-            if first_row:
-                # write header first
-                header = line.keys()
-                csv_output.writerow(header)
-                first_row = False
+                # export all the chunk's rows
+                csv_output.writerows(structured_table.values())
 
-            # export all line's values
-            csv_output.writerow(line.values())
-
-        output_file.close()
         self._log_save(save_file)
@@ -15,8 +15,8 @@
 #
 
 import json
-import random
-from typing import final
+from contextlib import ExitStack
+from typing import final, List, TextIO
 
 from .__base import __BaseStructuredDataType
 
@@ -25,41 +25,105 @@ class JSONDocument(__BaseStructuredDataType):
     EXT = "json"
 
     @final
-    def __init__(self, config_file=None):
-        super().__init__(extension=JSONDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=JSONDocument.EXT, config_file=config_file, seed=seed)
 
         # todo, add to configurable
-        self.indent = random.randint(0, 25)  # formatting stuff
+        self.indent = self._random.randint(0, 25)  # formatting stuff
+
+        self._json_styles = self._get_active_styles(self._configurable_dict)
+
+    @classmethod
+    def get_file_count(cls, configurable_dict: dict) -> int:
+        return len(cls._get_active_styles(configurable_dict))
+
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        # every style writes the same rows, so the table is only picked once
+        return super().get_expected_draws(configurable_dict, 1)
+
+    @staticmethod
+    def _get_active_styles(configurable_dict: dict) -> List[str]:
+        """
+        Create a list of json formats we're going to export, as (file decorator, writer method name) pairs. Each style
+        keeps its own file decorator whether or not the other styles are active.
+        """
+        json_styles = []
+        active_styles = configurable_dict["structured_data"]["json_document"]["active_styles"]
+
+        if active_styles["pretty_print"]:
+            json_styles.append(("1", "_write_style_1"))
+
+        if active_styles["compact"]:
+            json_styles.append(("2", "_write_style_2"))
+
+        if active_styles["json_lines"]:
+            json_styles.append(("3", "_write_style_3"))
+
+        return json_styles
 
     @final
     def save(self, save_path: str) -> None:
         """
-        Saves the structured array into various json formats
+        Saves the structured array into various json formats. The rows are streamed into every file at the same time,
+        so the whole table is never held in memory.
         """
 
-        json_save_file_1 = self.setup_save_file(save_path=save_path, extension=self.extension, optional_decorator="1")
-        json_save_file_2 = self.setup_save_file(save_path=save_path, extension=self.extension, optional_decorator="2")
+        json_styles = self._json_styles[:self._file_limit]
+        save_files = [self.setup_save_file(save_path=save_path, extension=self.extension, optional_decorator=decorator)
+                      for decorator, _ in json_styles]
+
+        with ExitStack() as stack:
+            files = [stack.enter_context(open(save_file, "w")) for save_file in save_files]
+            writers = [getattr(self, method_name) for _, method_name in json_styles]
+
+            row_count = 0
+            for row in self._iter_structured_rows():
+                for writer, f in zip(writers, files):
+                    writer(f, row, row_count)
+                row_count += 1
+
+            for writer, f in zip(writers, files):
+                writer(f, None, row_count)
+
+        for save_file in save_files:
+            self._log_save(save_file)
 
-        structured_array = self._get_structured_data()
-        self._save_style_1(structured_array, json_save_file_1)
-        self._save_style_2(structured_array, json_save_file_2)
+    # Each style writer is called once per row with the row's index, then a final time with row=None and the total
+    # number of rows to close the file.
 
-    def _save_style_1(self, json_object: list, save_dir: str):
+    def _write_style_1(self, f: TextIO, row: dict, index: int) -> None:
         """
-        Saves the json in a pretty-print way.
+        Writes the json in a pretty-print way, matching json.dump(rows, f, indent=self.indent)
         """
 
-        with open(save_dir, "w") as f:
-            json.dump(json_object, f, indent=self.indent)
+        if row is None:
+            f.write("\n]" if index > 0 else "[]")
+            return
 
-        self._log_save(save_dir)
+        newline_indent = "\n" + " " * self.indent
+        f.write("[" + newline_indent if index == 0 else "," + newline_indent)
+        f.write(json.dumps(row, indent=self.indent).replace("\n", newline_indent))
 
-    def _save_style_2(self, json_object: list, save_dir: str):
+    @staticmethod
+    def _write_style_2(f: TextIO, row: dict, index: int) -> None:
         """
-        Writes a json without any "pretty-printing" styled indentations
+        Writes a json without any "pretty-printing" styled indentations, matching json.dump(rows, f)
         """
 
-        with open(save_dir, "w") as f:
-            json.dump(json_object, f)
+        if row is None:
+            f.write("]" if index > 0 else "[]")
+            return
+
+        f.write("[" if index == 0 else ", ")
+        f.write(json.dumps(row))
+
+    @staticmethod
+    def _write_style_3(f: TextIO, row: dict, index: int) -> None:
+        """
+        Writes the rows as json-lines, one json object per line.
+        """
 
-        self._log_save(save_dir)
+        if row is not None:
+            f.write(json.dumps(row))
+            f.write("\n")
@@ -14,7 +14,6 @@
 # limitations under the License.
 #
 import json
-import random
 import textwrap
 from typing import final
 
@@ -25,9 +24,9 @@ class LogDocument(__BaseStructuredDataType):
     EXT = "log"
 
     @final
-    def __init__(self, config_file=None):
-        super().__init__(extension=LogDocument.EXT, config_file=config_file)
-        self.__line_wrap = random.randint(80, 150)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=LogDocument.EXT, config_file=config_file, seed=seed)
+        self.__line_wrap = self._random.randint(80, 150)
 
     @final
     def save(self, save_path: str) -> None:
@@ -37,7 +36,6 @@ class LogDocument(__BaseStructuredDataType):
         """
 
         log_file = self.setup_save_file(save_path=save_path, extension=self.extension, optional_decorator="1")
-        structured_array = self._get_structured_data()
 
         with open(log_file, "w") as f:
             f.write("""
@@ -54,7 +52,7 @@ class LogDocument(__BaseStructuredDataType):
                             """)
 
             f.write("\n")
-            for line in structured_array:
+            for line in self._iter_structured_rows():
 
                 # Create the log statement that will dump the payload
                 payload_dump = f"Apr 09 08:37:39.828Z | production-env-837-deer-k84 | localhost - - [WARN] Unhandled " \
@@ -67,7 +65,7 @@ class LogDocument(__BaseStructuredDataType):
                 for wrap_line in wrapped_dump:
                     f.write(wrap_line + "\n")
 
-                for _ in range(random.randint(2, 5)):  # Write some normal-ish log statements to break up the file
+                for _ in range(self._random.randint(2, 5)):  # Write some normal-ish log statements to break up the file
                     f.write("Apr 09 08:37:39.828Z | production-env-837-deer-k84 | localhost - - [INFO] All looks "
                             "normal.\n")
 
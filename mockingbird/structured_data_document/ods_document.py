@@ -14,37 +14,127 @@
 # limitations under the License.
 #
 
-from typing import final
+import zipfile
+from typing import Iterable, final
 
-from pyexcel_ods import save_data
-
-from .__base import __BaseStructuredDataType
+from .._reproducible_zip import _ReproducibleZipFile
+from .._xml_text import escape_xml_text
+from .__base import __BaseStructuredDataType, _StructuredTable
 
 
 class ODSDocument(__BaseStructuredDataType):
+    """
+    Writes the structured data into an ods spreadsheet. Extra sheets filled with random jibberish can be added through
+    sheet_range, in which case one of the sheets has the sensitive-data hidden within it.
+    """
     EXT = "ods"
 
     @final
-    def __init__(self, config_file=None):
-        super().__init__(extension=ODSDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=ODSDocument.EXT, config_file=config_file, seed=seed)
+
+        self._sheet_range = self._configurable_dict["structured_data"]["ods_document"]["sheet_range"]
+        assert 1 <= self._sheet_range[0] <= self._sheet_range[1], "sheet_range must be a [lower, upper] pair"
 
     @final
     def save(self, save_path: str) -> None:
 
+        sheets = self._random.randint(*self._sheet_range)
+        pii_sheet = self._random.randint(0, sheets - 1)
+
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
-        structured_array = self._get_structured_data()
 
-        formatted_array = []
-        first_row = True
+        with _ODSWriter(save_file) as ods:
+            for x in range(sheets):
+                if x == pii_sheet:
+                    structured_tables = self._iter_structured_tables()
+                else:
+                    structured_tables = self._iter_structured_tables_no_sensitive_info()
+
+                ods.write_sheet("Sheet%d" % (x + 1), structured_tables)
+
+        self._log_save(save_file)
+
+
+class _ODSWriter:
+    """
+    A minimal streaming ods writer. Every cell is written as a string, and each sheet's rows are written straight into
+    the zip container's content.xml as they're generated, so only a single chunk of rows is ever held in memory.
+    """
+
+    MIMETYPE = "application/vnd.oasis.opendocument.spreadsheet"
+
+    MANIFEST = ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" '
+                'manifest:version="1.2">'
+                '<manifest:file-entry manifest:full-path="/" manifest:version="1.2" manifest:media-type="%s"/>'
+                '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+                '</manifest:manifest>' % MIMETYPE)
+
+    CONTENT_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>'
+                      '<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+                      'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+                      'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" office:version="1.2">'
+                      '<office:body><office:spreadsheet>')
+
+    CONTENT_FOOTER = "</office:spreadsheet></office:body></office:document-content>"
+
+    def __init__(self, ods_path: str):
+        self._zip_file = _ReproducibleZipFile(ods_path, "w", zipfile.ZIP_DEFLATED)
 
-        for line in structured_array:
-            if first_row:
+        # the mimetype has to be the first, uncompressed, entry
+        self._zip_file.writestr("mimetype", self.MIMETYPE, compress_type=zipfile.ZIP_STORED)
+        self._zip_file.writestr("META-INF/manifest.xml", self.MANIFEST)
+
+        # the size isn't known up front, so reserve zip64 sizes in case the streamed content passes 2 GiB
+        self._content = self._zip_file.open("content.xml", "w", force_zip64=True)
+        self._content.write(self.CONTENT_HEADER.encode("utf-8"))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write_sheet(self, name: str, structured_tables: Iterable[_StructuredTable]) -> None:
+        """
+        Writes a sheet, with the header of the first table followed by the rows of every table.
+
+        @param name: The sheet's name.
+        @param structured_tables: The chunks of rows making up the sheet, see _iter_structured_tables.
+        """
+        table = '<table:table table:name="%s">' % escape_xml_text(name, {'"': "&quot;"})
+        self._content.write(table.encode("utf-8"))
+
+        first_chunk = True
+        for structured_table in structured_tables:
+            if first_chunk:
                 # write header first
-                header = list(line.keys())
-                formatted_array.append(header)
-                first_row = False
+                header = ['<table:table-column table:number-columns-repeated="%d"/>' % len(structured_table.header),
+                          self.__get_row_xml(structured_table.header)]
+                self._content.write("".join(header).encode("utf-8"))
+                first_chunk = False
 
-            formatted_array.append(list(line.values()))
+            # export all the chunk's rows
+            self._content.write("".join(map(self.__get_row_xml, structured_table.values())).encode("utf-8"))
 
-        save_data(save_file, formatted_array)
-        self._log_save(save_file)
+        # a sheet needs at least one column
+        if first_chunk:
+            self._content.write(b"<table:table-column/>")
+
+        self._content.write(b"</table:table>")
+
+    def close(self) -> None:
+        if self._content.closed:
+            return
+
+        self._content.write(self.CONTENT_FOOTER.encode("utf-8"))
+        self._content.close()
+        self._zip_file.close()
+
+    @staticmethod
+    def __get_row_xml(row: Iterable[str]) -> str:
+        cells = "".join('<table:table-cell office:value-type="string"><text:p>%s</text:p></table:table-cell>'
+                        % escape_xml_text(str(value)).replace("\n", "</text:p><text:p>") for value in row)
+
+        return "<table:table-row>%s</table:table-row>" % cells
@@ -14,40 +14,53 @@
 # limitations under the License.
 #
 from abc import abstractmethod
+from typing import Iterator
 
-import pandas
+import pyarrow
 
-from ..__base import __BaseStructuredDataType
+from ..__base import __BaseStructuredDataType, _StructuredTable
 
 
 class __BasePandaDocument(__BaseStructuredDataType):
     """
-    A wrapper for handling Panda DataFrame styled documents using Mockingbird.
+    A wrapper for handling Arrow styled documents using Mockingbird.
 
-    The list of structured-data dictionaries found in __BaseStructuredDataType needs done in smaller chunks, or else
-    Pandas will crash converting it to a DataFrame.
+    Arrow tables are built straight from the columns of __BaseStructuredDataType's structured tables, rather than
+    converting rows of dictionaries, so only a single copy of the data is ever held in memory.
     """
 
     @abstractmethod
-    def __init__(self, extension: str, config_file=None):
-        super().__init__(extension=extension, config_file=config_file)
+    def __init__(self, extension: str, config_file=None, seed=None):
+        super().__init__(extension=extension, config_file=config_file, seed=seed)
 
         self.chunk_size = self._configurable_dict["base_structured_data"]["pandas_document"]["chunk_size"]
 
-    def _get_data_frame(self):
-        structured_data = self._get_structured_data()
+    def _get_arrow_table(self) -> pyarrow.Table:
+        """
+        Returns the structured data as an Arrow table, made of record batches of at most chunk_size rows.
+        """
+        record_batches = list(self._iter_record_batches())
 
-        # chunk the list up into chunk_size lists
-        chunked_list = [structured_data[i:i + self.chunk_size] for i in range(0, len(structured_data), self.chunk_size)]
-        del structured_data
+        if not record_batches:
+            return pyarrow.table(dict())
 
-        data_frame_list = []
-        # pop and delete off the list (for memory management), and converting them into DataFrames
-        while chunked_list:
-            head = chunked_list.pop()
-            new_data_frame = pandas.DataFrame.from_dict(head)
-            del head
-            data_frame_list.append(new_data_frame)
+        return pyarrow.Table.from_batches(record_batches)
 
-        concatenated_df = pandas.concat(data_frame_list)
-        return concatenated_df
+    def _iter_record_batches(self) -> Iterator[pyarrow.RecordBatch]:
+        """
+        Streams the structured data as Arrow record batches of at most chunk_size rows, with every column stored as
+        strings.
+        """
+        for structured_table in self._iter_structured_tables(self.chunk_size):
+            yield self._to_record_batch(structured_table)
+
+    @staticmethod
+    def _to_record_batch(structured_table: _StructuredTable) -> pyarrow.RecordBatch:
+        """
+        Converts a structured table into an Arrow record batch, with every column stored as strings.
+        """
+        column_dict = structured_table.column_dict()
+
+        return pyarrow.RecordBatch.from_arrays([pyarrow.array(column, type=pyarrow.string())
+                                                for column in column_dict.values()],
+                                               names=list(column_dict.keys()))
@@ -15,58 +15,174 @@
 #
 
 import json
-import numpy as np
-import avro.schema
-from avro.io import DatumWriter
-from avro.datafile import DataFileWriter
-
-from typing import final
+import zlib
+from typing import BinaryIO, Iterator, List, final
 
 from .__base import __BasePandaDocument
+from ..__base import _StructuredTable
+
+try:
+    import fastavro
+except ImportError:  # fastavro is optional, it's only needed for codecs the pure-python encoder doesn't support.
+    fastavro = None
 
+AVRO_MAGIC = b"Obj\x01"
+SYNC_SIZE = 16
 
-AVRO_TYPES = {
-    np.dtype('?'): 'boolean',
-    np.int8: 'int',
-    np.int16: 'int',
-    np.int32: 'int',
-    np.uint8: {'type': 'int', 'unsigned': True},
-    np.uint16: {'type': 'int', 'unsigned': True},
-    np.uint32: {'type': 'int', 'unsigned': True},
-    np.int64: 'long',
-    np.uint64: {'type': 'long', 'unsigned': True},
-    np.dtype('O'): 'string',
-    np.unicode_: 'string',
-    np.float32: 'float',
-    np.float64: 'double',
+# Codecs the pure-python encoder supports, fastavro supports more (i.e snappy, zstandard) when it's installed.
+CODECS = {
+    "null": lambda data: data,
+    "deflate": lambda data: zlib.compress(data)[2:-4],  # raw deflate, without the zlib header and checksum
 }
 
 
+def _encode_long(n: int) -> bytes:
+    """
+    Encodes an integer as an avro long (a zig-zag encoded variable-length integer).
+    """
+    n = (n << 1) ^ (n >> 63)
+    encoded = bytearray()
+
+    while n & ~0x7F:
+        encoded.append((n & 0x7F) | 0x80)
+        n >>= 7
+    encoded.append(n)
+
+    return bytes(encoded)
+
+
+# Most strings are short, so their length prefixes are pre-computed.
+_ENCODED_LENGTHS = [_encode_long(n) for n in range(1024)]
+
+
+def _encode_string(value: str) -> bytes:
+    """
+    Encodes a string as avro bytes, its length followed by its utf-8 encoding.
+    """
+    encoded = value.encode("utf-8")
+    length = len(encoded)
+
+    if length < len(_ENCODED_LENGTHS):
+        return _ENCODED_LENGTHS[length] + encoded
+
+    return _encode_long(length) + encoded
+
+
 class AvroDocument(__BasePandaDocument):
     EXT = "avro"
 
-    def __init__(self, config_file=None):
-        super().__init__(extension=AvroDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=AvroDocument.EXT, config_file=config_file, seed=seed)
+
+        avro_config = self._configurable_dict["structured_data"]["avro_document"]
+        self._codec = avro_config["codec"]
+        self._sync_interval = avro_config["sync_interval"]
+        self._use_fastavro = avro_config["use_fastavro"] or self._codec not in CODECS
+
+        assert not self._use_fastavro or fastavro is not None, \
+            "fastavro is required for use_fastavro, or avro codec %s, see pip install mockingbird[avro]" % self._codec
 
     @final
     def save(self, save_path: str) -> None:
+        """
+        Streams the structured data into an avro container file, encoding records a block at a time straight from the
+        table's columns. Uses a batched pure-python encoder, or fastavro when it's enabled (or the codec requires it).
+        """
         save_file = self.setup_save_file(save_path=save_path, extension="avro")
+        structured_tables = self._iter_structured_tables(self.chunk_size)
+
+        with open(save_file, 'wb') as f:
+            if self._use_fastavro:
+                self._write_fastavro(f, structured_tables)
+            else:
+                self._write_batched(f, structured_tables)
 
-        df = self._get_data_frame()
+        self._log_save(save_file)
 
-        schema = {
+    @staticmethod
+    def _get_schema(header: List[str]) -> dict:
+        """
+        Every column of a structured table holds strings.
+        """
+        return {
             "type": "record",
             "name": "TestData",
-            "fields": [
-                {'name': key, 'type': AVRO_TYPES[np_type]}
-                for key, np_type in df.dtypes.items()
-            ]
+            "fields": [{'name': key, 'type': 'string'} for key in header]
         }
 
-        with open(save_file, 'wb') as f:
-            writer = DataFileWriter(f, DatumWriter(), avro.schema.parse(json.dumps(schema)))
-            for i, row in df.iterrows():
-                writer.append(row.to_dict())
-            writer.close()
+    def _write_fastavro(self, f: BinaryIO, structured_tables: Iterator[_StructuredTable]) -> None:
+        """
+        Writes the records using fastavro's compiled writer.
+        """
+        first_table = next(structured_tables, None)
+        header = list(first_table.column_dict().keys()) if first_table else []
 
-        self._log_save(save_file)
+        def records():
+            if first_table:
+                yield from first_table.rows()
+
+            for structured_table in structured_tables:
+                yield from structured_table.rows()
+
+        fastavro.writer(f, fastavro.parse_schema(self._get_schema(header)), records(), codec=self._codec,
+                        sync_interval=self._sync_interval, sync_marker=self._np_random.bytes(SYNC_SIZE))
+
+    def _write_batched(self, f: BinaryIO, structured_tables: Iterator[_StructuredTable]) -> None:
+        """
+        Writes the records using a pure-python encoder. Each column of a table is encoded in one pass, the encoded
+        cells are joined into records, and records are flushed as a data block whenever the block reaches
+        _sync_interval bytes.
+        """
+        sync_marker = self._np_random.bytes(SYNC_SIZE)
+        compress = CODECS[self._codec]
+
+        def write_block(records: List[bytes]) -> None:
+            data = compress(b"".join(records))
+            f.write(_encode_long(len(records)) + _encode_long(len(data)))
+            f.write(data)
+            f.write(sync_marker)
+
+        header_written = False
+        block = []
+        block_size = 0
+
+        for structured_table in structured_tables:
+            column_dict = structured_table.column_dict()
+
+            if not header_written:
+                self._write_header(f, list(column_dict.keys()), sync_marker)
+                header_written = True
+
+            encoded_columns = [[_encode_string(value) for value in column] for column in column_dict.values()]
+            for record in map(b"".join, zip(*encoded_columns)):
+                block.append(record)
+                block_size += len(record)
+
+                if block_size >= self._sync_interval:
+                    write_block(block)
+                    block = []
+                    block_size = 0
+
+        if not header_written:
+            self._write_header(f, [], sync_marker)
+
+        if block:
+            write_block(block)
+
+    def _write_header(self, f: BinaryIO, header: List[str], sync_marker: bytes) -> None:
+        """
+        Writes the avro container file header, the magic bytes, the file meta-data (schema & codec) as an avro map,
+        then the sync marker.
+        """
+        meta_data = {
+            "avro.schema": json.dumps(self._get_schema(header)).encode("utf-8"),
+            "avro.codec": self._codec.encode("utf-8"),
+        }
+
+        f.write(AVRO_MAGIC)
+        f.write(_encode_long(len(meta_data)))
+        for key, value in meta_data.items():
+            f.write(_encode_string(key))
+            f.write(_encode_long(len(value)) + value)
+        f.write(_encode_long(0))
+        f.write(sync_marker)
@@ -16,20 +16,75 @@
 
 from typing import final
 
+import pyarrow
+import pyarrow.parquet
+
 from ..panda_documents.__base import __BasePandaDocument
 
 
 class ParquetDocument(__BasePandaDocument):
     EXT = "parquet"
 
-    def __init__(self, config_file=None):
-        super().__init__(extension=ParquetDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=ParquetDocument.EXT, config_file=config_file, seed=seed)
+
+        parquet_config = self._configurable_dict["structured_data"]["parquet_document"]
+        self._streaming = parquet_config["streaming"]
+        self._row_group_size = parquet_config["row_group_size"]
+        self._compression = parquet_config["compression"]
+        self._use_dictionary = parquet_config["use_dictionary"]
 
     @final
     def save(self, save_path: str) -> None:
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
 
-        dataframe = self._get_data_frame()
-        dataframe.to_parquet(save_file)
+        if self._streaming:
+            self._save_streaming(save_file)
+            return
+
+        arrow_table = self._get_arrow_table()
+        pyarrow.parquet.write_table(arrow_table, save_file, row_group_size=self._row_group_size,
+                                    compression=self._compression, use_dictionary=self._use_dictionary)
 
         self._log_save(save_file)
+
+    def _save_streaming(self, save_file: str) -> None:
+        """
+        Writes the parquet file one row group at a time, so only a single row group is ever held in memory. Since
+        every row group is generated separately, the meta-data records the row group, row offset and column of each
+        keyword's sensitive-data.
+        """
+
+        writer = None
+        sensitive_data_locations = dict()
+        row_offset = 0
+
+        try:
+            for row_group, structured_table in enumerate(self._iter_structured_tables(self._row_group_size)):
+                record_batch = self._to_record_batch(structured_table)
+
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(save_file, record_batch.schema,
+                                                           compression=self._compression,
+                                                           use_dictionary=self._use_dictionary)
+
+                writer.write_batch(record_batch, row_group_size=self._row_group_size)
+
+                column_names = record_batch.schema.names
+                for keyword in structured_table.sensitive_columns.values():
+                    sensitive_data_locations.setdefault(keyword, []).append({"row_group": row_group,
+                                                                             "row_offset": row_offset,
+                                                                             "row_count": len(structured_table),
+                                                                             "column": column_names.index(keyword)})
+
+                row_offset += len(structured_table)
+
+            # an empty table still needs a file
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(save_file, pyarrow.schema([]))
+
+        finally:
+            if writer is not None:
+                writer.close()
+
+        self._log_save(save_file, sensitive_data_locations)
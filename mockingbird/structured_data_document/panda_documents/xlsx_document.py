@@ -13,36 +13,55 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-import random
+import zipfile
 from typing import final
 
+import xlsxwriter
 from openpyxl import Workbook
+from openpyxl.writer.excel import ExcelWriter
 
-from .__base import __BasePandaDocument
+from ..._reproducible_zip import FIXED_DATETIME, _ReproducibleZipFile
 from ..__base import __BaseDocument, __BaseStructuredDataType
 
 
 class XLSXDocument(__BaseDocument):
     EXT = "xlsx"
 
-    def __init__(self, config_file=None):
-        super().__init__(extension=XLSXDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=XLSXDocument.EXT, config_file=config_file, seed=seed)
 
-        # Create a list of formats we're going to save xlsx files in.
-        self._xlsx_styles = []
-        active_styles = self._configurable_dict["structured_data"]["xlsx_document"]["active_styles"]
+        self._xlsx_styles = self._get_active_styles(self._configurable_dict)
+
+    @classmethod
+    def get_file_count(cls, configurable_dict: dict) -> int:
+        return len(cls._get_active_styles(configurable_dict))
+
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        return sum(style.get_expected_draws(configurable_dict, 1)
+                   for style in cls._get_active_styles(configurable_dict)[:file_limit])
+
+    @staticmethod
+    def _get_active_styles(configurable_dict: dict) -> list:
+        """
+        Create a list of formats we're going to save xlsx files in.
+        """
+        xlsx_styles = []
+        active_styles = configurable_dict["structured_data"]["xlsx_document"]["active_styles"]
 
         if active_styles["pandas_xlsx_writer"]:
-            self._xlsx_styles.append(_XlsxDocumentPandasXlsxWriterStyle)
+            xlsx_styles.append(_XlsxDocumentXlsxWriterStyle)
 
         if active_styles["openpyxl"]:
-            self._xlsx_styles.append(_XlsxDocumentOpenPyxlStyle)
+            xlsx_styles.append(_XlsxDocumentOpenPyxlStyle)
+
+        return xlsx_styles
 
     @final
     def save(self, save_path: str) -> None:
 
-        for style in self._xlsx_styles:
-            instantiated_style = style(config_file=self._config_file)
+        for style in self._xlsx_styles[:self._file_limit]:
+            instantiated_style = style(config_file=self._config_file, seed=self._spawn_seed())
             instantiated_style.clone_sensitive_data(other=self)
             instantiated_style.save(save_path=save_path)
             self._meta_data_object.add_other_meta_data(instantiated_style._meta_data_object)
@@ -50,60 +69,80 @@ class XLSXDocument(__BaseDocument):
 
 class _XlsxDocumentOpenPyxlStyle(__BaseStructuredDataType):
     @final
-    def __init__(self, config_file=None):
-        super().__init__(extension=XLSXDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=XLSXDocument.EXT, config_file=config_file, seed=seed)
 
     @final
     def save(self, save_path: str) -> None:
         """
         Writes the structured data into a xlsx file. Fills the other pages in the excel sheet with random jibberish, but
         one of the pages has a pii-entry hidden within it somewhere.
+
+        The workbook is write-only, so each row is streamed to disk as it's appended rather than kept in memory.
         """
 
         # How many pages for the excel file
-        pages = random.randint(1, 10)  # todo, add to config / support for this
-        pii_page = random.randint(0, pages - 1)
+        pages = self._random.randint(1, 10)  # todo, add to config / support for this
+        pii_page = self._random.randint(0, pages - 1)
 
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
-        wb = Workbook()
+        wb = Workbook(write_only=True)
 
         for x in range(pages):
-            ws = wb.create_sheet("mysheet", x)
-
-            first_row = True
+            ws = wb.create_sheet("mysheet")
 
             if x == pii_page:
-                structured_array = self._get_structured_data()
+                structured_tables = self._iter_structured_tables()
             else:
-                structured_array = self._get_structured_data_no_sensitive_info()
+                structured_tables = self._iter_structured_tables_no_sensitive_info()
 
-            for line in structured_array:
-                if first_row:
+            first_chunk = True
+            for structured_table in structured_tables:
+                if first_chunk:
                     # write header first
-                    header = list(line.keys())
-                    ws.append(header)
-                    first_row = False
+                    ws.append(structured_table.header)
+                    first_chunk = False
 
-                # export all line's values
-                ws.append(list(line.values()))
+                # export all the chunk's rows
+                for row in structured_table.values():
+                    ws.append(row)
 
-        wb.save(save_file)
+        # saved through ExcelWriter rather than wb.save, which stamps the workbook with the current time
+        wb.properties.created = wb.properties.modified = FIXED_DATETIME
+        ExcelWriter(wb, _ReproducibleZipFile(save_file, "w", zipfile.ZIP_DEFLATED, allowZip64=True)).save()
         self._log_save(save_file)
 
 
-class _XlsxDocumentPandasXlsxWriterStyle(__BasePandaDocument):
+class _XlsxDocumentXlsxWriterStyle(__BaseStructuredDataType):
     """
-    Writes an xlsx document using Pandas dataframes and the xlsxwriter library.
+    Writes an xlsx document using the xlsxwriter library, laid out the same way pandas' DataFrame.to_excel lays out a
+    sheet (an index column and a bold header). The workbook uses xlsxwriter's constant_memory mode, where each row is
+    flushed to disk once the next row is started.
     """
 
-    def __init__(self, config_file=None):
-        super().__init__(XLSXDocument.EXT, config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(XLSXDocument.EXT, config_file, seed)
 
     @final
     def save(self, save_path: str) -> None:
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
 
-        dataframe = self._get_data_frame()
-        dataframe.to_excel(save_file, engine="xlsxwriter")
+        workbook = xlsxwriter.Workbook(save_file, {"constant_memory": True})
+        workbook.set_properties({"created": FIXED_DATETIME})
+        worksheet = workbook.add_worksheet()
+        header_format = workbook.add_format({"bold": True, "border": 1, "align": "center"})
+
+        row_index = 0
+        for structured_table in self._iter_structured_tables():
+            if row_index == 0:
+                # write header first, leaving the index column empty
+                worksheet.write_row(0, 1, structured_table.header, header_format)
+
+            # export all the chunk's rows, each starting with its index
+            for row in structured_table.values():
+                worksheet.write_number(row_index + 1, 0, row_index, header_format)
+                worksheet.write_row(row_index + 1, 1, row)
+                row_index += 1
 
+        workbook.close()
         self._log_save(save_file)
@@ -14,7 +14,6 @@
 # limitations under the License.
 #
 
-import random
 from typing import final
 
 import yaml
@@ -26,17 +25,25 @@ class YAMLDocument(__BaseStructuredDataType):
     EXT = "yaml"
 
     @final
-    def __init__(self, config_file=None):
-        super().__init__(extension=YAMLDocument.EXT, config_file=config_file)
-        self.indent = random.randint(0, 25)  # formatting stuff
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=YAMLDocument.EXT, config_file=config_file, seed=seed)
+        self.indent = self._random.randint(0, 25)  # formatting stuff
 
     @final
     def save(self, save_path: str) -> None:
+        """
+        Streams the structured data into a yaml file. Each chunk of rows is dumped as a block sequence, and since block
+        sequences can be appended to each other, the file ends up being a single list of every row.
+        """
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
 
-        structured_array = self._get_structured_data()
-
         with open(save_file, 'w') as file:
-            documents = yaml.dump(structured_array, file)
+            empty = True
+            for structured_table in self._iter_structured_tables():
+                yaml.dump(list(structured_table.rows()), file)
+                empty = False
+
+            if empty:
+                yaml.dump([], file)
 
         self._log_save(save_file)
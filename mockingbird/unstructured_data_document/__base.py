@@ -15,7 +15,7 @@
 #
 
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from ..__base import __BaseDocument
 
@@ -27,11 +27,17 @@ class __BaseUnstructuredDataType(__BaseDocument, ABC):
     repeated functions.
     """
 
-    def __init__(self, extension=None, config_file=None):
-        super().__init__(extension=extension, config_file=config_file)
+    # how many items each enumerated group (see _get_enumerated_style) holds
+    _ENUMERATED_BOUNDS = 10
+
+    def __init__(self, extension=None, config_file=None, seed=None):
+        super().__init__(extension=extension, config_file=config_file, seed=seed)
 
         # todo
-        self._enumerated_bounds = 10
+        self._enumerated_bounds = self._ENUMERATED_BOUNDS
+
+        # how many words are generated at once when streaming sensitive-soup
+        self._stream_chunk_size = self._configurable_dict["base_unstructured_data"]["stream_chunk_size"]
 
     # Abstract Methods #
 
@@ -41,24 +47,42 @@ class __BaseUnstructuredDataType(__BaseDocument, ABC):
 
     # Protected Methods #
 
-    def _get_sensitive_soup(self) -> str:
+    def _iter_sensitive_soup(self) -> Iterator[str]:
+        """
+        Streams a "sensitive soup" of keyword/value pairs mixed between words, in chunks of at most
+        _stream_chunk_size words, so it can be written to a file of any size without being held in memory.
         """
-        Returns a "sensitive soup" of keyword/value pairs mixed between words.
+
+        for pieces, _ in self._iter_sensitive_soup_pieces():
+            yield "".join(pieces)
+
+    def _iter_sensitive_soup_pieces(self) -> Iterator[Tuple[List[str], Dict[int, str]]]:
+        """
+        Generates the "sensitive soup" in batches of at most _stream_chunk_size pieces. Each piece is a random word or
+        a keyword/value pair, followed by a space. The random words of a batch are drawn all at once.
+
+        @return: An iterator of (pieces, pii_pieces) tuples, where pii_pieces maps the index of each piece within the
+                 batch containing sensitive-data to its (keyword, value).
         """
 
         pii_positions = self._get_embedded_positions()
 
-        sensitive_soup = ""
-        for x in range(self._total_entries):
-            if x in pii_positions:
-                # todo why replace "\n" with "\n\n"? I can't remember the reason. Has something to do with
-                # generating certifications.
-                sensitive_soup += pii_positions[x] + " " + self._get_sensitive_data(pii_positions[x]).replace("\n",
-                                                                                                              "\n\n") + " "
-            else:
-                sensitive_soup += self._get_random_word() + " "
+        for start in range(0, self._total_entries, self._stream_chunk_size):
+            piece_count = min(self._stream_chunk_size, self._total_entries - start)
+            pieces = (self._get_random_word_array(piece_count) + " ").tolist()
+
+            pii_pieces = dict()
+            for x in pii_positions:
+                if start <= x < start + piece_count:
+                    keyword = pii_positions[x]
 
-        return sensitive_soup
+                    # todo why replace "\n" with "\n\n"? I can't remember the reason. Has something to do with
+                    # generating certifications.
+                    value = self._get_sensitive_data(keyword)
+                    pieces[x - start] = keyword + " " + value.replace("\n", "\n\n") + " "
+                    pii_pieces[x - start] = keyword, value
+
+            yield pieces, pii_pieces
 
     def _get_chat_log(self) -> List[str]:
         """
@@ -75,27 +99,34 @@ class __BaseUnstructuredDataType(__BaseDocument, ABC):
             Trem_Ble_Shin, [Jan 6, 2021 at 10:27:20 PM]:
                 Sure, my ssn is 555-5555
         """
-        chat_log: List[str] = []
+        return [line for line, _ in self._iter_chat_log()]
+
+    def _iter_chat_log(self) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Same as _get_chat_log, except the lines are generated lazily.
+
+        @return: An iterator of (line, pii) tuples, where pii is the (keyword, value) of the sensitive-data found in the
+                 line, or None if the line doesn't contain any.
+        """
 
         pii_positions = self._get_embedded_positions()
 
         for x in range(self._total_entries):
             if x in pii_positions:
                 keyword = pii_positions[x]
-                chat_log.append("kuroi_katto, [Jan 6, 2021 at 10:27:10 PM]:")
-                chat_log.append("Can you send me the %s" % keyword)
+                yield "kuroi_katto, [Jan 6, 2021 at 10:27:10 PM]:", None
+                yield "Can you send me the %s" % keyword, None
 
-                chat_log.append("Trem_Ble_Shin, [Jan 6, 2021 at 10:27:20 PM]:")
-                chat_log.append("Sure, my %s is %s" % (keyword, self._get_sensitive_data(keyword=keyword)))
+                yield "Trem_Ble_Shin, [Jan 6, 2021 at 10:27:20 PM]:", None
+                value = self._get_sensitive_data(keyword=keyword)
+                yield "Sure, my %s is %s" % (keyword, value), (keyword, value)
 
             else:
-                chat_log.append("kuroi_katto, [Jan 6, 2021 at 10:27:10 PM]:")
-                chat_log.append(" ".join([self._get_random_word() for _ in range(self._enumerated_bounds)]))
-
-                chat_log.append("Trem_Ble_Shin, [Jan 6, 2021 at 10:27:20 PM]:")
-                chat_log.append(" ".join([self._get_random_word() for _ in range(self._enumerated_bounds)]))
+                yield "kuroi_katto, [Jan 6, 2021 at 10:27:10 PM]:", None
+                yield " ".join([self._get_random_word() for _ in range(self._enumerated_bounds)]), None
 
-        return chat_log
+                yield "Trem_Ble_Shin, [Jan 6, 2021 at 10:27:20 PM]:", None
+                yield " ".join([self._get_random_word() for _ in range(self._enumerated_bounds)]), None
 
     def _get_enumerated_style(self) -> List[Tuple[str, List[str]]]:
         """
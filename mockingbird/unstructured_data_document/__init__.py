@@ -13,11 +13,3 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-
-from .docx_document import DOCXDocument
-from .pdf_document import PDFDocument
-from .pptx_document import PPTXDocument
-from .txt_document import TXTDocument
-
-__all__ = ['PPTXDocument', 'PDFDocument', 'DOCXDocument', 'TXTDocument']
-__all_classes__ = [PPTXDocument, PDFDocument, DOCXDocument, TXTDocument]
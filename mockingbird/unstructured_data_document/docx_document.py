@@ -14,11 +14,16 @@
 # limitations under the License.
 #
 
-
-from typing import final
+import io
+import threading
+import zipfile
+from itertools import chain
+from typing import Iterable, Iterator, final
 
 from docx import Document
 
+from .._reproducible_zip import _ReproducibleZipFile
+from .._xml_text import escape_xml_text
 from .__base import __BaseDocument
 from .__base import __BaseUnstructuredDataType
 
@@ -26,57 +31,198 @@ from .__base import __BaseUnstructuredDataType
 class DOCXDocument(__BaseDocument):
     EXT = "docx"
 
-    def __init__(self, config_file=None):
-        super().__init__(extension=DOCXDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=DOCXDocument.EXT, config_file=config_file, seed=seed)
+
+        self._docx_styles = self._get_active_styles(self._configurable_dict)
+
+    @classmethod
+    def get_file_count(cls, configurable_dict: dict) -> int:
+        return len(cls._get_active_styles(configurable_dict))
 
-        # Create a list of docx formats we're going to export.
-        self._docx_styles = []
-        active_styles = self._configurable_dict["unstructured_data"]["docx_document"]["active_styles"]
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        return sum(style.get_expected_draws(configurable_dict, 1)
+                   for style in cls._get_active_styles(configurable_dict)[:file_limit])
+
+    @staticmethod
+    def _get_active_styles(configurable_dict: dict) -> list:
+        """
+        Create a list of docx formats we're going to export.
+        """
+        docx_styles = []
+        active_styles = configurable_dict["unstructured_data"]["docx_document"]["active_styles"]
 
         if active_styles["paragraph_style"]:
-            self._docx_styles.append(_DocxParagraphStyle)
+            docx_styles.append(_DocxParagraphStyle)
 
         if active_styles["footer_style"]:
-            self._docx_styles.append(_DocxFooterStyle)
+            docx_styles.append(_DocxFooterStyle)
 
         if active_styles["bullet_point_style"]:
-            self._docx_styles.append(_DocxBulletPointStyle)
+            docx_styles.append(_DocxBulletPointStyle)
 
         if active_styles["chat_style"]:
-            self._docx_styles.append(_DocxChatStyle)
+            docx_styles.append(_DocxChatStyle)
+
+        return docx_styles
 
     @final
     def save(self, save_path: str) -> None:
 
-        for style in self._docx_styles:
-            instantiated_style = style(config_file=self._config_file)
+        for style in self._docx_styles[:self._file_limit]:
+            instantiated_style = style(config_file=self._config_file, seed=self._spawn_seed())
             instantiated_style.clone_sensitive_data(other=self)
             instantiated_style.save(save_path=save_path)
             self._meta_data_object.add_other_meta_data(instantiated_style._meta_data_object)
 
 
+class _DocxTemplate:
+    """
+    python-docx's default template, loaded once per process. Rather than building every document through python-docx's
+    object model, documents are saved by copying the template's parts, and streaming the body (and optionally the
+    footer) straight into the part's xml, one paragraph at a time.
+    """
+
+    _PLACEHOLDER = "MOCKINGBIRD_PLACEHOLDER"
+    _DOCUMENT_PART = "word/document.xml"
+
+    __templates = dict()
+    __lock = threading.Lock()
+
+    def __init__(self, footer: bool):
+        """
+        Saves an empty python-docx document containing a placeholder paragraph (and footer if requested), then splits
+        the placeholder out of the xml.
+        """
+        document = Document()
+        document.add_paragraph(self._PLACEHOLDER)
+
+        if footer:
+            document.sections[0].footer.paragraphs[0].text = self._PLACEHOLDER
+
+        buffer = io.BytesIO()
+        document.save(buffer)
+
+        placeholder_run = "<w:r><w:t>%s</w:t></w:r>" % self._PLACEHOLDER
+        self._parts = []
+        self._footer_part = None
+
+        with zipfile.ZipFile(buffer) as zf:
+            for name in zf.namelist():
+                data = zf.read(name)
+
+                if name == self._DOCUMENT_PART:
+                    prefix, suffix = data.decode("utf-8").split("<w:p>%s</w:p>" % placeholder_run)
+                    self._document_xml = (prefix, suffix)
+
+                elif footer and self._PLACEHOLDER.encode("utf-8") in data:
+                    prefix, suffix = data.decode("utf-8").split(placeholder_run)
+                    self._footer_part = name
+                    self._footer_xml = (prefix, suffix)
+
+                self._parts.append((name, data))
+
+    @classmethod
+    def get(cls, footer: bool = False) -> "_DocxTemplate":
+        """
+        @param footer: If the template needs a footer.
+        @return: The process-wide template.
+        """
+        with cls.__lock:
+            if footer not in cls.__templates:
+                cls.__templates[footer] = _DocxTemplate(footer)
+
+            return cls.__templates[footer]
+
+    def save(self, save_file: str, body: Iterable[str], footer: Iterable[str] = ()) -> None:
+        """
+        Writes a docx file.
+
+        @param save_file: The file to write.
+        @param body: xml fragments making up the document's body, see _get_paragraph_xml.
+        @param footer: xml fragments making up the footer paragraph's runs, see _get_text_xml. Only used if the template
+                       was created with a footer.
+        """
+        with _ReproducibleZipFile(save_file, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, data in self._parts:
+                if name == self._DOCUMENT_PART:
+                    self.__write_streamed_part(zf, name, self._document_xml, body)
+
+                elif name == self._footer_part:
+                    self.__write_streamed_part(zf, name, self._footer_xml, chain(["<w:r>"], footer, ["</w:r>"]))
+
+                else:
+                    zf.writestr(name, data)
+
+    @staticmethod
+    def __write_streamed_part(zf: zipfile.ZipFile, name: str, xml: tuple, fragments: Iterable[str],
+                              batch_size: int = 1000) -> None:
+        prefix, suffix = xml
+
+        # the size isn't known up front, so reserve zip64 sizes in case the streamed part passes 2 GiB
+        with zf.open(name, "w", force_zip64=True) as part:
+            part.write(prefix.encode("utf-8"))
+
+            batch = []
+            for fragment in fragments:
+                batch.append(fragment)
+
+                if len(batch) == batch_size:
+                    part.write("".join(batch).encode("utf-8"))
+                    batch = []
+
+            part.write(("".join(batch) + suffix).encode("utf-8"))
+
+
+def _get_text_xml(text: str) -> str:
+    """
+    Returns the xml of text within a run, converting new-lines and tabs the same way python-docx does.
+    Characters XML can't hold are dropped.
+    """
+    text = escape_xml_text(text).replace("\r", "\n")
+    text = text.replace("\n", '</w:t><w:br/><w:t xml:space="preserve">')
+    text = text.replace("\t", '</w:t><w:tab/><w:t xml:space="preserve">')
+
+    return '<w:t xml:space="preserve">%s</w:t>' % text
+
+
+def _get_paragraph_xml(text: str, style: str = None) -> str:
+    """
+    Returns the xml of a paragraph containing text.
+
+    @param style: Optional, the id of the paragraph's style, i.e "Title", "Heading1" or "ListBullet".
+    """
+    if style is None:
+        return "<w:p><w:r>%s</w:r></w:p>" % _get_text_xml(text)
+
+    return '<w:p><w:pPr><w:pStyle w:val="%s"/></w:pPr><w:r>%s</w:r></w:p>' % (style, _get_text_xml(text))
+
+
 class _DocxParagraphStyle(__BaseUnstructuredDataType):
     """
     Writes a simple paragraph containing sensitive-soup.
     """
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="docx", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="docx", config_file=config_file, seed=seed)
 
     @final
     def save(self, save_path: str) -> None:
         """
-
+        Streams the sensitive-soup into a single paragraph.
         """
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
+        _DocxTemplate.get().save(save_file, self.__iter_body())
+        self._log_save(save_file)
 
-        document = Document()
-        document.add_heading('Paragraph Styled Document', 0)
+    def __iter_body(self) -> Iterator[str]:
+        yield _get_paragraph_xml('Paragraph Styled Document', "Title")
 
-        sensitive_soup = self._get_sensitive_soup()
-        document.add_paragraph(sensitive_soup)
-        document.save(save_file)
-        self._log_save(save_file)
+        yield "<w:p><w:r>"
+        for sensitive_soup in self._iter_sensitive_soup():
+            yield _get_text_xml(sensitive_soup)
+        yield "</w:r></w:p>"
 
 
 class _DocxFooterStyle(__BaseUnstructuredDataType):
@@ -84,80 +230,74 @@ class _DocxFooterStyle(__BaseUnstructuredDataType):
     Writes a simple document with sensitive-soup in the footer.
     """
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="docx", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="docx", config_file=config_file, seed=seed)
 
     @final
     def save(self, save_path: str) -> None:
         """
-
+        Streams the sensitive-soup into the footer.
         """
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
-        sensitive_soup = self._get_sensitive_soup()
-
-        document = Document()
-        document.add_heading('Sensitive-Data in Footer Styled Document', 0)
 
-        section = document.sections[0]
-        footer = section.footer
-        footer.paragraphs[0].text = sensitive_soup
+        body = [_get_paragraph_xml('Sensitive-Data in Footer Styled Document', "Title")]
+        footer = (_get_text_xml(sensitive_soup) for sensitive_soup in self._iter_sensitive_soup())
 
-        document.save(save_file)
+        _DocxTemplate.get(footer=True).save(save_file, body, footer)
         self._log_save(save_file)
 
 
 class _DocxBulletPointStyle(__BaseUnstructuredDataType):
     """
-    Writes a simple document with sensitive-soup in the footer.
+    Writes a simple document with sensitive-data stored in bullet points.
     """
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="docx", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="docx", config_file=config_file, seed=seed)
+
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        # every value of an enumerated group is sensitive-data
+        return file_limit * cls._ENUMERATED_BOUNDS
 
     @final
     def save(self, save_path: str) -> None:
         """
-
+        Writes a heading for each enumerated group, followed by a bullet point for each of its items.
         """
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
-        enumerated_groups = self._get_enumerated_style()
-
-        document = Document()
-        document.add_heading('Sensitive Data Stored in Bullet Points', 0)
+        _DocxTemplate.get().save(save_file, self.__iter_body())
+        self._log_save(save_file)
 
-        for group in enumerated_groups:
-            key, enumerated_items = group
+    def __iter_body(self) -> Iterator[str]:
+        yield _get_paragraph_xml('Sensitive Data Stored in Bullet Points', "Title")
 
-            document.add_heading(key, level=1)
+        for key, enumerated_items in self._get_enumerated_style():
+            yield _get_paragraph_xml(key, "Heading1")
 
             for item in enumerated_items:
-                document.add_paragraph(item, style="List Bullet")
-
-        document.save(save_file)
-        self._log_save(save_file)
+                yield _get_paragraph_xml(item, "ListBullet")
 
 
 class _DocxChatStyle(__BaseUnstructuredDataType):
     """
-    Writes a simple document with sensitive-soup in the footer.
+    Writes a simple document containing a chat-log, one paragraph per line.
     """
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="docx", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="docx", config_file=config_file, seed=seed)
 
     @final
     def save(self, save_path: str) -> None:
         """
-
+        Streams the chat-log into the document, one paragraph per line.
         """
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
-        chat_log = self._get_chat_log()
-
-        document = Document()
-        document.add_heading('A chat between two people', 0)
+        _DocxTemplate.get().save(save_file, self.__iter_body())
+        self._log_save(save_file)
 
-        for line in chat_log:
-            document.add_paragraph(line)
+    def __iter_body(self) -> Iterator[str]:
+        yield _get_paragraph_xml('A chat between two people', "Title")
 
-        document.save(save_file)
-        self._log_save(save_file)
+        for line, _ in self._iter_chat_log():
+            yield _get_paragraph_xml(line)
@@ -14,8 +14,8 @@
 # limitations under the License.
 #
 
-
-from typing import final
+import zlib
+from typing import Tuple, final
 
 from .__base import __BaseDocument
 from .__base import __BaseUnstructuredDataType
@@ -23,107 +23,272 @@ from .__base import __BaseUnstructuredDataType
 
 class PDFDocument(__BaseDocument):
     """
-    Writes PDF's containing sensitive-text to a single page. This will be expanded on in the future, as it's
-    functionality is fairly limited.
+    Writes PDF's containing sensitive-text, spread over as many pages as the text needs.
     """
     EXT = "pdf"
 
     @final
-    def __init__(self, config_file=None):
-        super().__init__(extension=PDFDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=PDFDocument.EXT, config_file=config_file, seed=seed)
+
+        self._docx_styles = self._get_active_styles(self._configurable_dict)
+
+    @classmethod
+    def get_file_count(cls, configurable_dict: dict) -> int:
+        return len(cls._get_active_styles(configurable_dict))
+
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        return sum(style.get_expected_draws(configurable_dict, 1)
+                   for style in cls._get_active_styles(configurable_dict)[:file_limit])
 
-        # Create a list of docx formats we're going to export.
-        self._docx_styles = []
-        active_styles = self._configurable_dict["unstructured_data"]["pdf_document"]["active_styles"]
+    @staticmethod
+    def _get_active_styles(configurable_dict: dict) -> list:
+        """
+        Create a list of pdf formats we're going to export.
+        """
+        pdf_styles = []
+        active_styles = configurable_dict["unstructured_data"]["pdf_document"]["active_styles"]
 
         if active_styles["paragraph_style"]:
-            self._docx_styles.append(_PDFParagraphStyle)
+            pdf_styles.append(_PDFParagraphStyle)
 
         if active_styles["chat_style"]:
-            self._docx_styles.append(_PDFChatStyle)
+            pdf_styles.append(_PDFChatStyle)
+
+        return pdf_styles
 
     @final
     def save(self, save_path: str) -> None:
 
-        for style in self._docx_styles:
-            instantiated_style = style(config_file=self._config_file)
+        for style in self._docx_styles[:self._file_limit]:
+            instantiated_style = style(config_file=self._config_file, seed=self._spawn_seed())
             instantiated_style.clone_sensitive_data(other=self)
             instantiated_style.save(save_path=save_path)
             self._meta_data_object.add_other_meta_data(instantiated_style._meta_data_object)
 
 
-class _PDF_Wrapper():
-    """
-    A really basic wrapper to write text to pdf's. Very limited functionality.
+class _PDFWriter:
     """
+    A minimal streaming pdf writer, which writes text as fixed-width lines using the standard Helvetica font. A new page
+    is started whenever the current one is full, and every finished page is compressed and written straight to the
+    file, so only the page being written is ever held in memory.
 
-    def __init__(self, pdf_path: str):
-        from reportlab.pdfgen import canvas
-
-        self._current_line = 1
-        self._font_size = 12
-
-        self.width = 750
-        self.height = 1200
-        pagesize = (self.width, self.height)
+    Helvetica isn't embedded, so text is limited to the font's cp1252 (WinAnsiEncoding) characters, and any other
+    character (i.e CJK or Cyrillic) is written as "?". See can_render.
 
-        self.canvas = canvas.Canvas(pdf_path, pagesize=pagesize)
-        self.canvas.setLineWidth(.3)
-        self.canvas.setFont('Helvetica', self._font_size)
-
-    def __split_every_n(self, n: int, to_split: str):
-        return [to_split[i:i + n] for i in range(0, len(to_split), n)]
-
-    def save_pdf(self):
-        self.canvas.save()
-
-    def write_line(self, text: str):
-        lines_to_write = self.__split_every_n(80, text)
-
-        for line in lines_to_write:
-            assert self.height - (self._font_size * self._current_line) > 0, "We broke the page."
+    Pages and lines are numbered from 1.
+    """
 
-            self._current_line += 1
-            self.canvas.drawString(30, self.height - (self._font_size * self._current_line), line)
+    def __init__(self, pdf_path: str, width: int = 750, height: int = 1200, font_size: int = 12,
+                 line_length: int = 80):
+        self.width = width
+        self.height = height
+        self._font_size = font_size
+        self._line_length = line_length
+        self._lines_per_page = height // font_size - 2
+
+        self._file = open(pdf_path, "wb")
+        self._offsets = dict()
+        self._next_object = 4
+        self._page_objects = []
+
+        self._page_lines = []
+        self._pending = ""
+        self._wrapped = False
+
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self.__write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        self.__write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_objects) + (1 if self._page_lines else 0)
+
+    @staticmethod
+    def can_render(text: str) -> bool:
+        """
+        @return: Whether every character of text can be written, rather than replaced with "?".
+        """
+        try:
+            text.encode("cp1252")
+        except UnicodeEncodeError:
+            return False
+
+        return True
+
+    def get_location(self) -> Tuple[int, int]:
+        """
+        @return: The (page, line) the next character written will end up on.
+        """
+        if len(self._page_lines) == self._lines_per_page:
+            return len(self._page_objects) + 2, 1
+
+        return len(self._page_objects) + 1, len(self._page_lines) + 1
+
+    def write(self, text: str) -> Tuple[int, int]:
+        """
+        Writes text to the end of the current line, wrapping it every line_length characters, and starting a new line
+        at every new-line character. A new-line right after the text was wrapped doesn't start another (empty) line.
+
+        @return: The (page, line) the text starts on.
+        """
+        location = self.get_location()
+
+        for x, part in enumerate(text.split("\n")):
+            if x:
+                if self._pending or not self._wrapped:
+                    self.__draw_line(self._pending)
+                self._pending = ""
+                self._wrapped = False
+
+            if part:
+                self._pending += part
+                self._wrapped = False
+
+            while len(self._pending) >= self._line_length:
+                self.__draw_line(self._pending[:self._line_length])
+                self._pending = self._pending[self._line_length:]
+                self._wrapped = True
+
+        return location
+
+    def write_line(self, text: str) -> Tuple[int, int]:
+        """
+        Same as write, except the current line is ended after the text.
+        """
+        return self.write(text + "\n")
+
+    def close(self) -> None:
+        """
+        Writes the remaining text, the page tree and the cross-reference table, then closes the file.
+        """
+        if self._file.closed:
+            return
+
+        if self._pending:
+            self.__draw_line(self._pending)
+            self._pending = ""
+
+        if self._page_lines or not self._page_objects:
+            self.__flush_page()
+
+        kids = " ".join("%d 0 R" % page_object for page_object in self._page_objects)
+        self.__write_object(2, ("<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_objects))).encode())
+
+        xref_offset = self._file.tell()
+        object_count = self._next_object
+        xref = ["xref", "0 %d" % object_count, "0000000000 65535 f "]
+        xref.extend("%010d 00000 n " % self._offsets[x] for x in range(1, object_count))
+        xref.extend(["trailer", "<< /Size %d /Root 1 0 R >>" % object_count, "startxref", str(xref_offset), "%%EOF"])
+
+        self._file.write(("\n".join(xref) + "\n").encode())
+        self._file.close()
+
+    def __draw_line(self, line: str) -> None:
+        if len(self._page_lines) == self._lines_per_page:
+            self.__flush_page()
+
+        self._page_lines.append(line)
+
+    def __flush_page(self) -> None:
+        """
+        Compresses the current page's text into a content stream, and writes it along with the page object.
+        """
+        content = ["BT", "/F1 %d Tf" % self._font_size, "%d TL" % self._font_size,
+                   "30 %d Td" % (self.height - self._font_size * 2)]
+        content.extend("(%s) Tj T*" % self.__escape(line) for line in self._page_lines)
+        content.append("ET")
+        stream = zlib.compress("\n".join(content).encode("cp1252", errors="replace"))
+
+        content_object = self.__reserve_object()
+        self.__write_object(content_object, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) +
+                            stream + b"\nendstream")
+
+        page_object = self.__reserve_object()
+        self.__write_object(page_object, ("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] "
+                                          "/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                                          % (self.width, self.height, content_object)).encode())
+
+        self._page_objects.append(page_object)
+        self._page_lines = []
+
+    def __reserve_object(self) -> int:
+        number = self._next_object
+        self._next_object += 1
+        return number
+
+    def __write_object(self, number: int, body: bytes) -> None:
+        self._offsets[number] = self._file.tell()
+        self._file.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    @staticmethod
+    def __escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").replace("\r", "")
 
 
 class _PDFParagraphStyle(__BaseUnstructuredDataType):
     """
-    Writes a simple paragraph containing sensitive-soup.
+    Writes a simple paragraph containing sensitive-soup. The meta-data records the page and line each keyword's
+    sensitive-data starts on. Sensitive-data the pdf can't render (see _PDFWriter) isn't counted or located.
     """
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="pdf", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="pdf", config_file=config_file, seed=seed)
 
     @final
     def save(self, save_path: str) -> None:
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
+        sensitive_data_locations = dict()
+
+        with _PDFWriter(save_file) as pdf:
+            for pieces, pii_pieces in self._iter_sensitive_soup_pieces():
+                for x, piece in enumerate(pieces):
+                    page, line = pdf.write(piece)
 
-        sensitive_soup = self._get_sensitive_soup()
+                    if x not in pii_pieces:
+                        continue
 
-        pdf = _PDF_Wrapper(save_file)
-        pdf.write_line(sensitive_soup)
+                    keyword, value = pii_pieces[x]
+                    if pdf.can_render(value):
+                        sensitive_data_locations.setdefault(keyword, []).append({"page": page, "line": line})
+                    else:
+                        self._discard_sensitive_data(keyword, value)
 
-        pdf.save_pdf()
-        self._log_save(save_file)
+        self._log_save(save_file, sensitive_data_locations)
 
 
 class _PDFChatStyle(__BaseUnstructuredDataType):
     """
-    Writes a basic chat-log styled format.
+    Writes a basic chat-log styled format. The meta-data records the page and line of each sensitive-data message.
+    Sensitive-data the pdf can't render (see _PDFWriter) isn't counted or located.
     """
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="pdf", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="pdf", config_file=config_file, seed=seed)
 
     @final
     def save(self, save_path: str) -> None:
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
-        chat_log = self._get_chat_log()
-        pdf = _PDF_Wrapper(save_file)
+        sensitive_data_locations = dict()
+
+        with _PDFWriter(save_file) as pdf:
+            for chat_line, pii in self._iter_chat_log():
+                page, line = pdf.write_line(chat_line)
+
+                if pii is None:
+                    continue
 
-        for line in chat_log:
-            pdf.write_line(line)
+                keyword, value = pii
+                if pdf.can_render(value):
+                    sensitive_data_locations.setdefault(keyword, []).append({"page": page, "line": line})
+                else:
+                    self._discard_sensitive_data(keyword, value)
 
-        pdf.save_pdf()
-        self._log_save(save_file)
+        self._log_save(save_file, sensitive_data_locations)
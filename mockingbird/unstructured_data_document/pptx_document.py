@@ -14,11 +14,17 @@
 # limitations under the License.
 #
 
-
-from typing import final
+import io
+import re
+import threading
+import zipfile
+from itertools import chain, islice
+from typing import Iterable, Iterator, Tuple, final
 
 from pptx import Presentation
 
+from .._reproducible_zip import _ReproducibleZipFile
+from .._xml_text import escape_xml_text
 from .__base import __BaseDocument
 from .__base import __BaseUnstructuredDataType
 
@@ -27,103 +33,270 @@ class PPTXDocument(__BaseDocument):
     EXT = "pptx"
 
     @final
-    def __init__(self, config_file=None):
-        super().__init__(extension=PPTXDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=PPTXDocument.EXT, config_file=config_file, seed=seed)
+
+        self._docx_styles = self._get_active_styles(self._configurable_dict)
+
+    @classmethod
+    def get_file_count(cls, configurable_dict: dict) -> int:
+        return len(cls._get_active_styles(configurable_dict))
 
-        # Create a list of docx formats we're going to export.
-        self._docx_styles = []
-        active_styles = self._configurable_dict["unstructured_data"]["pptx_document"]["active_styles"]
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        return sum(style.get_expected_draws(configurable_dict, 1)
+                   for style in cls._get_active_styles(configurable_dict)[:file_limit])
+
+    @staticmethod
+    def _get_active_styles(configurable_dict: dict) -> list:
+        """
+        Create a list of pptx formats we're going to export.
+        """
+        pptx_styles = []
+        active_styles = configurable_dict["unstructured_data"]["pptx_document"]["active_styles"]
 
         if active_styles["paragraph_style"]:
-            self._docx_styles.append(_PPTXParagraphStyle)
+            pptx_styles.append(_PPTXParagraphStyle)
 
         if active_styles["bullet_point_style"]:
-            self._docx_styles.append(_PPTXBulletPointStyle)
+            pptx_styles.append(_PPTXBulletPointStyle)
+
+        return pptx_styles
 
     @final
     def save(self, save_path: str) -> None:
 
-        for style in self._docx_styles:
-            instantiated_style = style()
+        for style in self._docx_styles[:self._file_limit]:
+            instantiated_style = style(config_file=self._config_file, seed=self._spawn_seed())
             instantiated_style.clone_sensitive_data(other=self)
             instantiated_style.save(save_path=save_path)
             self._meta_data_object.add_other_meta_data(instantiated_style._meta_data_object)
 
 
-class _PPTXParagraphStyle(__BaseUnstructuredDataType):
+class _PPTXTemplate:
     """
-    Writes a simple paragraph containing sensitive-soup.
+    python-pptx's default presentation, loaded once per process. Rather than building every presentation through
+    python-pptx's object model, presentations are saved by copying the template's parts, and writing each slide's xml
+    straight from a title-slide or bullet-slide template. The slide list, relationships and content types are generated
+    once every slide has been written, so slides can be streamed to the file one at a time.
     """
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="pptx", config_file=config_file)
+    _TITLE_LAYOUT = "title"
+    _BULLET_LAYOUT = "bullet"
 
-    @final
-    def save(self, save_path: str) -> None:
-        save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
+    _TITLE = "MOCKINGBIRD_TITLE"
+    _BODY = "MOCKINGBIRD_BODY"
+
+    _SLIDE_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide"
+    _SLIDE_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
 
-        sensitive_soup = self._get_sensitive_soup()
+    __template = None
+    __lock = threading.Lock()
 
+    def __init__(self):
+        """
+        Saves a python-pptx presentation containing a title slide and a bullet slide, both holding placeholder text,
+        then splits the placeholders out of the xml.
+        """
         prs = Presentation()
-        title_slide_layout = prs.slide_layouts[0]
-        slide = prs.slides.add_slide(title_slide_layout)
-        title = slide.shapes.title
-        subtitle = slide.placeholders[1]
 
-        title.text = "A simple title / subtitle slide"
-        subtitle.text = sensitive_soup
+        for layout in prs.slide_layouts[0], prs.slide_layouts[1]:
+            slide = prs.slides.add_slide(layout)
+            slide.shapes.title.text = self._TITLE
+            slide.placeholders[1].text = self._BODY
 
-        prs.save(save_file)
-        self._log_save(save_file)
+        buffer = io.BytesIO()
+        prs.save(buffer)
 
+        self._parts = []
+        self._slides = dict()
 
-class _PPTXBulletPointStyle(__BaseUnstructuredDataType):
+        with zipfile.ZipFile(buffer) as zf:
+            for name in zf.namelist():
+                data = zf.read(name)
+
+                if name == "ppt/slides/slide1.xml":
+                    self._slides[self._TITLE_LAYOUT] = (self.__split_placeholders(data),
+                                                        zf.read("ppt/slides/_rels/slide1.xml.rels"))
+
+                elif name == "ppt/slides/slide2.xml":
+                    self._slides[self._BULLET_LAYOUT] = (self.__split_placeholders(data),
+                                                         zf.read("ppt/slides/_rels/slide2.xml.rels"))
+
+                elif name == "ppt/presentation.xml":
+                    self._presentation_xml = re.split("<p:sldIdLst>.*</p:sldIdLst>", data.decode("utf-8"))
+
+                elif name == "ppt/_rels/presentation.xml.rels":
+                    rels = re.sub('<Relationship Id="[^"]*" Type="%s" Target="[^"]*"/>' % self._SLIDE_TYPE, "",
+                                  data.decode("utf-8"))
+                    self._presentation_rels = rels.split("</Relationships>")
+                    self._first_slide_rid = max(int(rid) for rid in re.findall('Id="rId([0-9]+)"', rels)) + 1
+
+                elif name == "[Content_Types].xml":
+                    content_types = re.sub('<Override PartName="/ppt/slides/[^"]*" ContentType="[^"]*"/>', "",
+                                           data.decode("utf-8"))
+                    self._content_types = content_types.split("</Types>")
+
+                elif not name.startswith("ppt/slides/"):
+                    self._parts.append((name, data))
+
+    @classmethod
+    def get(cls) -> "_PPTXTemplate":
+        """
+        @return: The process-wide template.
+        """
+        with cls.__lock:
+            if cls.__template is None:
+                cls.__template = _PPTXTemplate()
+
+            return cls.__template
+
+    def __split_placeholders(self, data: bytes) -> list:
+        """
+        Splits a slide's xml into the xml before the title, between the title and body, and after the body.
+        """
+        placeholder = "<a:p><a:r><a:t>%s</a:t></a:r></a:p>"
+        return re.split("%s|%s" % (placeholder % self._TITLE, placeholder % self._BODY), data.decode("utf-8"))
+
+    def save(self, save_file: str, slides: Iterable[Tuple[str, str, Iterable[str]]]) -> None:
+        """
+        Writes a pptx file.
+
+        @param save_file: The file to write.
+        @param slides: (layout, title, body) tuples, where layout is "title" or "bullet", and body is an iterable of
+                       paragraph xml fragments (see _get_paragraph_xml). Each body is only consumed while its slide is
+                       being written.
+        """
+        with _ReproducibleZipFile(save_file, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, data in self._parts:
+                zf.writestr(name, data)
+
+            slide_count = 0
+            for layout, title, body in slides:
+                slide_count += 1
+                (head, middle, tail), rels = self._slides[layout]
+
+                # the size isn't known up front, so reserve zip64 sizes in case the streamed slide passes 2 GiB
+                with zf.open("ppt/slides/slide%d.xml" % slide_count, "w", force_zip64=True) as part:
+                    part.write((head + _get_paragraph_xml(title) + middle).encode("utf-8"))
+                    _write_batched(part, body)
+                    part.write(tail.encode("utf-8"))
+
+                zf.writestr("ppt/slides/_rels/slide%d.xml.rels" % slide_count, rels)
+
+            slide_numbers = range(1, slide_count + 1)
+            rids = [self._first_slide_rid + x - 1 for x in slide_numbers]
+
+            sld_ids = "".join('<p:sldId id="%d" r:id="rId%d"/>' % (255 + x, rid) for x, rid in zip(slide_numbers, rids))
+            prefix, suffix = self._presentation_xml
+            zf.writestr("ppt/presentation.xml", prefix + "<p:sldIdLst>%s</p:sldIdLst>" % sld_ids + suffix)
+
+            relationships = "".join('<Relationship Id="rId%d" Type="%s" Target="slides/slide%d.xml"/>'
+                                    % (rid, self._SLIDE_TYPE, x) for x, rid in zip(slide_numbers, rids))
+            prefix, suffix = self._presentation_rels
+            zf.writestr("ppt/_rels/presentation.xml.rels", prefix + relationships + "</Relationships>" + suffix)
+
+            overrides = "".join('<Override PartName="/ppt/slides/slide%d.xml" ContentType="%s"/>'
+                                % (x, self._SLIDE_CONTENT_TYPE) for x in slide_numbers)
+            prefix, suffix = self._content_types
+            zf.writestr("[Content_Types].xml", prefix + overrides + "</Types>" + suffix)
+
+
+def _write_batched(part, fragments: Iterable[str], batch_size: int = 1000) -> None:
     """
-    Writes a simple powerpoint with sensitive-soup in a bullet point.
+    Writes xml fragments to a zip file's part, batch_size fragments at a time.
+    """
+    batch = []
+
+    for fragment in fragments:
+        batch.append(fragment)
+
+        if len(batch) == batch_size:
+            part.write("".join(batch).encode("utf-8"))
+            batch = []
+
+    part.write("".join(batch).encode("utf-8"))
+
+
+def _get_text_xml(text: str, paragraph_properties: str = "") -> str:
+    """
+    Returns the escaped text of a run, starting a new paragraph at every new-line the same way python-pptx does.
+    Characters XML can't hold are dropped.
+    """
+    return escape_xml_text(text).replace("\n", "</a:t></a:r></a:p><a:p>%s<a:r><a:t>" % paragraph_properties)
+
+
+def _get_paragraph_xml(text: str, level: int = 0) -> str:
+    """
+    Returns the xml of a paragraph containing text, indented to level.
+    """
+    paragraph_properties = '<a:pPr lvl="%d"/>' % level if level else ""
+
+    return "<a:p>%s<a:r><a:t>%s</a:t></a:r></a:p>" % (paragraph_properties,
+                                                      _get_text_xml(text, paragraph_properties))
+
+
+class _PPTXParagraphStyle(__BaseUnstructuredDataType):
+    """
+    Writes title / subtitle slides, with the sensitive-soup spread over the subtitles of slide_count slides.
     """
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="pptx", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="pptx", config_file=config_file, seed=seed)
+
+        self._slide_count = self._configurable_dict["unstructured_data"]["pptx_document"]["slide_count"]
+        assert type(self._slide_count) is int and self._slide_count > 0, "slide_count must be a positive integer"
 
     @final
     def save(self, save_path: str) -> None:
-        """
-
-        """
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
-        enumerated_groups = self._get_enumerated_style()
+        _PPTXTemplate.get().save(save_file, self.__iter_slides())
+        self._log_save(save_file)
 
-        prs = Presentation()
+    def __iter_slides(self) -> Iterator[Tuple[str, str, Iterator[str]]]:
+        pieces = chain.from_iterable(pieces for pieces, _ in self._iter_sensitive_soup_pieces())
+        pieces_per_slide = -(-self._total_entries // self._slide_count)
 
-        title_slide_layout = prs.slide_layouts[0]
-        slide = prs.slides.add_slide(title_slide_layout)
-        title = slide.shapes.title
-        subtitle = slide.placeholders[1]
+        for _ in range(self._slide_count):
+            yield "title", "A simple title / subtitle slide", self.__iter_paragraph(islice(pieces, pieces_per_slide))
 
-        title.text = "An executive meeting about productivity"
-        subtitle.text = "The executive put sensitive information in one of his productivity bullet points to feel " \
-                        "productive "
+    @staticmethod
+    def __iter_paragraph(pieces: Iterable[str]) -> Iterator[str]:
+        yield "<a:p><a:r><a:t>"
+        for piece in pieces:
+            yield _get_text_xml(piece)
+        yield "</a:t></a:r></a:p>"
 
-        bullet_slide_layout = prs.slide_layouts[1]
 
-        for group in enumerated_groups:
-            key, enumerated_items = group
+class _PPTXBulletPointStyle(__BaseUnstructuredDataType):
+    """
+    Writes a simple powerpoint with sensitive-soup in a bullet point.
+    """
 
-            slide = prs.slides.add_slide(bullet_slide_layout)
-            shapes = slide.shapes
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="pptx", config_file=config_file, seed=seed)
 
-            title_shape = shapes.title
-            body_shape = shapes.placeholders[1]
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        # every value of an enumerated group is sensitive-data
+        return file_limit * cls._ENUMERATED_BOUNDS
 
-            title_shape.text = "Productivity is up 10%"
+    @final
+    def save(self, save_path: str) -> None:
+        """
+        Writes a title slide, followed by a bullet slide for each enumerated group.
+        """
+        save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
+        _PPTXTemplate.get().save(save_file, self.__iter_slides())
+        self._log_save(save_file)
 
-            tf = body_shape.text_frame
-            tf.text = key
+    def __iter_slides(self) -> Iterator[Tuple[str, str, Iterable[str]]]:
+        subtitle = "The executive put sensitive information in one of his productivity bullet points to feel " \
+                   "productive "
+        yield "title", "An executive meeting about productivity", [_get_paragraph_xml(subtitle)]
 
-            for x in range(len(enumerated_items)):
-                p = tf.add_paragraph()
-                p.text = enumerated_items[x]
-                p.level = 1
+        for key, enumerated_items in self._get_enumerated_style():
+            body = [_get_paragraph_xml(key)]
+            body.extend(_get_paragraph_xml(item, level=1) for item in enumerated_items)
 
-        prs.save(save_file)
-        self._log_save(save_file)
+            yield "bullet", "Productivity is up 10%", body
@@ -24,27 +24,44 @@ from .__base import __BaseUnstructuredDataType
 class TXTDocument(__BaseDocument):
     EXT = "txt"
 
-    def __init__(self, config_file=None):
-        super().__init__(extension=TXTDocument.EXT, config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension=TXTDocument.EXT, config_file=config_file, seed=seed)
 
-        # Create a list of docx formats we're going to export.
-        self._styles = []
-        active_styles = self._configurable_dict["unstructured_data"]["txt_document"]["active_styles"]
+        self._styles = self._get_active_styles(self._configurable_dict)
+
+    @classmethod
+    def get_file_count(cls, configurable_dict: dict) -> int:
+        return len(cls._get_active_styles(configurable_dict))
+
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        return sum(style.get_expected_draws(configurable_dict, 1)
+                   for style in cls._get_active_styles(configurable_dict)[:file_limit])
+
+    @staticmethod
+    def _get_active_styles(configurable_dict: dict) -> list:
+        """
+        Create a list of txt formats we're going to export.
+        """
+        txt_styles = []
+        active_styles = configurable_dict["unstructured_data"]["txt_document"]["active_styles"]
 
         if active_styles["paragraph_style"]:
-            self._styles.append(_TxtParagraphStyle)
+            txt_styles.append(_TxtParagraphStyle)
 
         if active_styles["bullet_point_style"]:
-            self._styles.append(_TxtBulletPointStyle)
+            txt_styles.append(_TxtBulletPointStyle)
 
         if active_styles["chat_style"]:
-            self._styles.append(_TxtChatStyle)
+            txt_styles.append(_TxtChatStyle)
+
+        return txt_styles
 
     @final
     def save(self, save_path: str) -> None:
 
-        for style in self._styles:
-            instantiated_style = style()
+        for style in self._styles[:self._file_limit]:
+            instantiated_style = style(config_file=self._config_file, seed=self._spawn_seed())
             instantiated_style.clone_sensitive_data(other=self)
             instantiated_style.save(save_path=save_path)
             self._meta_data_object.add_other_meta_data(instantiated_style._meta_data_object)
@@ -52,8 +69,8 @@ class TXTDocument(__BaseDocument):
 
 class _TxtParagraphStyle(__BaseUnstructuredDataType):
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="txt", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="txt", config_file=config_file, seed=seed)
 
     @final
     def save(self, save_path: str) -> None:
@@ -62,17 +79,20 @@ class _TxtParagraphStyle(__BaseUnstructuredDataType):
         """
         save_file = self.setup_save_file(save_path=save_path, extension=self.extension)
 
-        sensitive_soup = self._get_sensitive_soup()
-
         with open(save_file, "w") as f:
-            f.write(sensitive_soup)
+            f.writelines(self._iter_sensitive_soup())
 
         self._log_save(save_file)
 
 
 class _TxtBulletPointStyle(__BaseUnstructuredDataType):
-    def __init__(self, config_file=None):
-        super().__init__(extension="txt", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="txt", config_file=config_file, seed=seed)
+
+    @classmethod
+    def get_expected_draws(cls, configurable_dict: dict, file_limit: int) -> float:
+        # every value of an enumerated group is sensitive-data
+        return file_limit * cls._ENUMERATED_BOUNDS
 
     @final
     def save(self, save_path: str) -> None:
@@ -94,8 +114,8 @@ class _TxtBulletPointStyle(__BaseUnstructuredDataType):
 
 class _TxtChatStyle(__BaseUnstructuredDataType):
 
-    def __init__(self, config_file=None):
-        super().__init__(extension="txt", config_file=config_file)
+    def __init__(self, config_file=None, seed=None):
+        super().__init__(extension="txt", config_file=config_file, seed=seed)
 
     @final
     def save(self, save_path: str) -> None:
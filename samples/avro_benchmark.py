@@ -0,0 +1,91 @@
+#
+# Copyright 2021 Open Raven Inc. and the Mockingbird project authors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import importlib.util
+import json
+import os
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+
+def get_data_frame(document):
+    """
+    The document's table as a pandas DataFrame, the way the original avro path built it.
+    """
+    import pandas
+
+    return pandas.DataFrame(document._get_structured_table().column_dict(), copy=False)
+
+
+def legacy_save(document, save_file):
+    """
+    The original AvroDocument.save, a pandas DataFrame written row by row with the pure-python avro library.
+    """
+    import avro.schema
+    from avro.datafile import DataFileWriter
+    from avro.io import DatumWriter
+
+    df = get_data_frame(document)
+    schema = {
+        "type": "record",
+        "name": "TestData",
+        "fields": [{'name': key, 'type': 'string'} for key in df.columns]
+    }
+
+    with open(save_file, 'wb') as f:
+        writer = DataFileWriter(f, DatumWriter(), avro.schema.parse(json.dumps(schema)))
+        for i, row in df.iterrows():
+            writer.append(row.to_dict())
+        writer.close()
+
+
+def benchmark(rows=100000, columns=20):
+    """
+    Times the original avro path (if the avro library is installed, i.e pip install mockingbird[benchmark]) against
+    the batched encoder and fastavro (if installed), on the same table size.
+    """
+    from mockingbird.structured_data_document.panda_documents import avro_document
+
+    paths = [("batched encoder", False)]
+    if importlib.util.find_spec("avro") is not None:
+        paths.insert(0, ("legacy (pandas + avro)", None))
+    if avro_document.fastavro is not None:
+        paths.append(("fastavro", True))
+
+    with TemporaryDirectory() as temp_dir:
+        for name, use_fastavro in paths:
+            # the encoder is picked by the use_fastavro setting, layered on top of the default configuration
+            config = {"base_structured_data": {"entries_range": [rows, rows], "dictionary_range": [columns, columns]},
+                      "structured_data": {"avro_document": {"use_fastavro": bool(use_fastavro)}}}
+
+            document = avro_document.AvroDocument(config_file=config)
+            document.add_sensitive_data("ssn", ["000-00-0000", "999-99-9999"])
+
+            start = time.perf_counter()
+            if use_fastavro is None:
+                save_file = os.path.join(temp_dir, "legacy.avro")
+                legacy_save(document, save_file)
+            else:
+                document.save(temp_dir)
+                save_file = document.setup_save_file(save_path=temp_dir, extension="avro")
+            elapsed = time.perf_counter() - start
+
+            print("%-24s %8.2fs %12.0f rows/s %10d bytes" % (name, elapsed, rows / elapsed, os.path.getsize(save_file)))
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:]])
@@ -17,18 +17,19 @@ setup(name='mockingbird',
       author='Open Raven Team',
       author_email='opensource@openraven.com',
       install_requires=['openpyxl==3.1.2',
-                        'RandomWords==0.3.0',
                         'pyyaml==6.0.1',
-                        'pyexcel-ods==0.6.0',
                         'python-docx==0.8.11',
                         'requests==2.25.0',
                         'pyarrow==14.0.2',
                         'numpy>=1.19.5',
-                        'reportlab==3.6.12',
                         'pandas==1.5.2',
-                        'avro==1.11.1',
                         'python-pptx==0.6.21',
+                        'XlsxWriter>=3.0.0',
                         'pyspark==3.3.1'],
+      # fastavro is needed for avro files when use_fastavro is set, or the codec isn't null or deflate. The
+      # pure-python avro library is only used by samples/avro_benchmark.py, to time the original avro writer.
+      extras_require={'avro': ['fastavro>=1.7'],
+                      'benchmark': ['avro==1.11.1']},
       license='apache',
       entry_points={'console_scripts': ['mockingbird_cli=mockingbird.__command_line:main']},
       packages=find_packages(),